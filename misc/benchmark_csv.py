@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+compare the throughput of the readers of `csv` protocols
+
+Reads a protocol with every reader and prints rows per second and
+the speedup over :func:`csv.reader` followed by :func:`read_split_entry`,
+the former conversion of :func:`parser.parse_csv_protocol`.
+Without a protocol given one of `--rows` rows is generated.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+from appender import format_row
+from fastcsv import _Ints, iter_rows
+from records import iter_typed_rows
+
+
+def generate(path: str, rows: int) -> None:
+    """write a protocol of `rows` rows as the controller would"""
+
+    rng = random.Random(0)
+    start = 1546300800
+
+    with open(path, 'w') as outfile:
+        for i in range(rows):
+            t = start + i * 3600
+            tm = time.localtime(t)
+
+            if i % 50 == 0:
+                row = ('h', tm.tm_year, tm.tm_mon, tm.tm_mday, None, None, None, 'Urlaub')
+            elif i % 7 == 0:
+                row = ('e', tm.tm_year, tm.tm_mon, tm.tm_mday, None, t, t + 1800, 'task %d' % rng.randrange(100))
+            elif i % 101 == 0:
+                row = ('e', tm.tm_year, tm.tm_mon, tm.tm_mday, 900, None, None, 'say "hello"')
+            else:
+                row = ('e', tm.tm_year, tm.tm_mon, tm.tm_mday, rng.randrange(1, 9) * 900, None, None,
+                       'task %d' % rng.randrange(100))
+
+            outfile.write(format_row(row))
+
+
+def read_split_entry(infile) -> int:
+    # the former path of parse_csv_protocol
+    count = 0
+
+    for entry in csv.reader(infile):
+        for i in range(1, 7):
+            entry[i] = int(entry[i]) if entry[i] else None
+
+        entry.pop(1)
+        entry.pop(1)
+        count += 1
+
+    return count
+
+
+def read_typed_rows(infile) -> int:
+    return sum(1 for _ in iter_typed_rows(csv.reader(infile)))
+
+
+def iter_split_rows(infile):
+    """
+    typed rows by a tokenizer of str methods
+
+    Splits lines without quotes and those quoting the description only,
+    leaves all others to :func:`csv.reader`. Kept for comparison with
+    :func:`fastcsv.iter_rows`, which it does not outpace.
+    """
+
+    to_int = _Ints().__getitem__
+
+    for line in infile:
+        quotes = line.count('"')
+
+        if not quotes:
+            fields = line.rstrip('\r\n').split(',')
+        elif quotes == 2 and line.endswith('"\n'):
+            head, _, description = line.partition('"')
+            fields = head.split(',')
+            fields[-1] = description[:-2]
+        else:
+            fields = next(csv.reader(itertools.chain((line,), infile)))
+
+        if len(fields) != 8:
+            fields = next(csv.reader((line,)))
+
+        tag, year, month, day, duration, from_unixtime, to_unixtime, description = fields
+        yield (tag, to_int(year), to_int(month), to_int(day), to_int(duration) if duration else None,
+               int(from_unixtime) if from_unixtime else None,
+               int(to_unixtime) if to_unixtime else None, description)
+
+
+def read_split_tokenizer(infile) -> int:
+    return sum(1 for _ in iter_split_rows(infile))
+
+
+def read_fastcsv(infile) -> int:
+    return sum(1 for _ in iter_rows(infile))
+
+
+READERS = (
+    ('csv.reader + split_entry', read_split_entry),
+    ('csv.reader + iter_typed_rows', read_typed_rows),
+    ('str.split tokenizer', read_split_tokenizer),
+    ('fastcsv.iter_rows', read_fastcsv),
+)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='benchmark readers of csv protocols')
+    parser.add_argument('protocol', nargs='?', help='protocol to read, generated if omitted')
+    parser.add_argument('--rows', '-n', type=int, default=2000000, help='rows to generate')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='runs per reader, the best counts')
+
+    parsed = parser.parse_args()
+
+    path = parsed.protocol
+
+    if not path:
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        print('generating %d rows' % parsed.rows)
+        generate(path, parsed.rows)
+
+    try:
+        with open(path) as infile:
+            expected = list(iter_typed_rows(csv.reader(infile)))
+
+        with open(path) as infile:
+            if list(iter_rows(infile)) != expected:
+                sys.exit('fastcsv.iter_rows differs from csv.reader')
+
+        with open(path) as infile:
+            if list(iter_split_rows(infile)) != expected:
+                sys.exit('the str.split tokenizer differs from csv.reader')
+
+        baseline = None
+
+        for name, read in READERS:
+            best = None
+
+            for _ in range(parsed.repeat):
+                with open(path) as infile:
+                    started = time.perf_counter()
+                    count = read(infile)
+                    elapsed = time.perf_counter() - started
+
+                best = min(best or elapsed, elapsed)
+
+            baseline = baseline or best
+            print('%-30s %10.0f rows/s %6.2fx' % (name, count / best, baseline / best))
+
+    finally:
+        if not parsed.protocol:
+            os.remove(path)
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
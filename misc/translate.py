@@ -1,125 +1,158 @@
 #!/usr/bin/env python3
 """
-translate all csv files in the current directory from old to new `csv` format 
+translate all csv files in the current directory from old to new `csv` format
 and put them into :file:`./translated/`. Additionally create one large file
-:file:`./translated/translated.csv`
+:file:`./translated/translated.csv` holding all rows in chronological order.
+
+Legacy files are named :file:`<name>.<YY>-<MM>.csv`, each line of the form
+``<DD>.<MM>.;<Duration in float, comma as separator>;"<description>"``.
+Files are translated in parallel, rows are streamed through generators.
+Each file comes back sorted, :file:`translated.csv` merges them.
 """
 
-import pdb
 import os
 import csv
 import re
+import argparse
 import datetime
+import heapq
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+# from-to at the beginning of a description, e.g. `8:30-12`
+FROMTO = re.compile('^([0-9]{1,2})(?::([0-9]{1,2}))?-([0-9]{1,2})(?::([0-9]{1,2}))?')
+
+
+def get_year(filename: str) -> int:
+    """return the year given in a legacy filename"""
+
+    return int(os.path.basename(filename).split(sep='.')[1].split(sep='-')[0]) + 2000
+
+
+def iter_legacy_rows(lines: Iterable[str]) -> Iterator[list]:
+    """yield the rows of a legacy csv omitting empty, head and total lines"""
+
+    for line in csv.reader(lines, delimiter=';', quotechar='"'):
+        if line and 'Datum' not in line[0] and 'insgesamt' not in line[0]:
+            yield line
 
-ls = os.listdir()
 
-for file in ls:
+def translate_rows(rows: Iterable[list], year: int) -> Iterator[list]:
+    """
+    yield rows of the new format translated from legacy rows
 
-    print('\nprocessing file: ', file)
+    From-to found at the beginning of a description is moved into
+    the from and to columns.
 
-    protocol = []
+    :param rows: legacy rows as yielded by :func:`iter_legacy_rows`
+    :param year: year the rows belong to
+    :raises ValueError: when rows of different months are found
+    """
 
-    if file.endswith('.csv'):
-        with open(file) as file:
-            r = csv.reader(file, delimiter=';', quotechar='"')
-            for line in r:
-                if not line:
-                    print('empty.')
-                elif 'Datum' in line[0] or 'insgesamt' in line[0]:
-                    print('omit ', line)
-                else:
-                    print('add ', line)
-                    protocol.append(line)
+    month = None
 
+    for line in rows:
         # first field of legacy csv is <DD.MM.>
-        month = int(protocol[0][0].split(sep='.')[1])
+        day, row_month = (int(field) for field in line[0].split(sep='.')[:2])
+
+        if month is None:
+            month = row_month
+        elif row_month != month:
+            raise ValueError('date given via file does not match date in row')
+
+        # comma transition
+        duration = int(float(line[1].replace(',', '.', 1)) * 3600)
+
+        description = line[2]
+        from_unixtime = to_unixtime = None
+
+        match = FROMTO.match(description)
+        if match:
+            from_hour, from_minute, to_hour, to_minute = (int(group or 0) for group in match.groups())
+
+            from_unixtime = int(datetime.datetime(year, month, day, from_hour, from_minute).timestamp())
+            to_unixtime = int(datetime.datetime(year, month, day, to_hour, to_minute).timestamp())
+
+            description = description[match.end():]
+
+        yield ['e', year, month, day, duration, from_unixtime, to_unixtime, description]
+
+
+def get_date(row: list) -> list:
+    """return year, month and day of a row of the new format"""
 
-        # year is in the filename.
-        year = int(file.name.split(sep='.')[1].split(sep='-')[0]) + 2000
+    return row[1:4]
 
-        protocol_ng = []
 
-        for line in protocol:
-            print('processing %r' % line)
-            date = line[0].split(sep='.')
+def translate_file(filename: str) -> list:
+    """
+    translate a legacy file
 
-            if int(date[1]) != month:
-                raise ValueError('date given via file does not match date in row')
+    :return: list of rows of the new format in chronological order,
+        rows of a day in the order of the file
+    """
 
-            # comma transition
-            try:
-                idx = line[1].index(',')
-                line[1] = line[1][:idx] + '.' + line[1][idx + 1:]
-                print('change comma to %r' % line)
-            except ValueError:
-                print('unchanged')
+    with open(filename) as infile:
+        return sorted(translate_rows(iter_legacy_rows(infile), get_year(filename)), key=get_date)
 
-            protocol_ng.append(['e', year, month, int(date[0]), int(float(line[1]) * 3600), None, None, line[2]])
 
-        print(52 * '*' + '\n', protocol_ng, '\n' + 52 * '*')
+def translate(filenames: Iterable[str], outdir: str = 'translated', jobs: int = None,
+              verbose: bool = False) -> int:
+    """
+    translate legacy files into `outdir`
 
-        print('fumble out fromto')
+    One file per month is written as well as :file:`translated.csv`
+    containing the rows of all files sorted chronologically.
+    The output does not depend on the order of `filenames`.
 
-        for row in protocol_ng:
-            match = re.match('^[0-9:]{1,5}-[0-9:]{1,5}', row[7])
-            if match:
-                print('row contains fromto: %r' % row)
+    :param jobs: number of worker processes, number of CPUs if omitted
+    :return: number of rows translated
+    """
 
-                # get day
-                day = int(row[3])
+    filenames = sorted(filenames)
 
-                # get fromto
-                fromto = match.group().split(sep='-')
+    os.makedirs(outdir, exist_ok=True)
 
-                # get from 
-                time = fromto[0].split(sep=':')
-                from_hour = int(time[0])
-                try:
-                    from_minute = int(time[1])
-                except IndexError:
-                    from_minute = 0
+    files = []
 
-                from_unixtime = int (datetime.datetime(year, month, day, from_hour, from_minute).timestamp())
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for filename, rows in zip(filenames, executor.map(translate_file, filenames)):
+            if not rows:
+                if verbose:
+                    print('%s is empty' % filename)
+                continue
 
-                # get to
-                time = fromto[1].split(sep=':')
-                to_hour = int(time[0])
-                try:
-                    to_minute = int(time[1])
-                except IndexError:
-                    to_minute = 0
-            
-                to_unixtime = int (datetime.datetime(year, month, day, to_hour, to_minute).timestamp())
+            year, month = rows[0][1:3]
 
-                print('extend row. with fromtime %02d:%02d (%d) totime %02d:%02d (%d) at %d-%02d' % (
-                    from_hour, from_minute, from_unixtime, to_hour, to_minute, to_unixtime, year, month))
+            with open(os.path.join(outdir, '%02d%02d.csv' % (year, month)), 'w') as outfile:
+                csv.writer(outfile).writerows(rows)
 
-                row[5] = from_unixtime
-                row[6] = to_unixtime
+            if verbose:
+                print('%s: %d rows for %d-%02d' % (filename, len(rows), year, month))
 
-                print('remove match from %r' % row[5])
+            files.append(rows)
 
-                row[7] = row[7][match.end():]
+    # merge is stable so rows of a day keep the order of the files
+    with open(os.path.join(outdir, 'translated.csv'), 'w') as outfile:
+        csv.writer(outfile).writerows(heapq.merge(*files, key=get_date))
 
-                print(row)
+    return sum(len(rows) for rows in files)
 
-            else:
-                print('no fromto found in %r' % row)
-                
 
-        try:
-            os.mkdir('translated')
-        except FileExistsError:
-            pass
+if __name__ == '__main__':
 
-        with open('translated/%02d%02d.csv' % (year, month), 'w') as file:
-            csv.writer(file).writerows(protocol_ng)
+    parser = argparse.ArgumentParser(description='translate legacy etime csv files')
+    parser.add_argument('--outdir', '-o', default='translated', help='directory to write to')
+    parser.add_argument('--jobs', '-j', type=int, help='number of processes')
+    parser.add_argument('--verbose', '-v', action='store_true', help='report every file')
 
-        with open('translated/translated.csv', 'a') as file:
-            csv.writer(file).writerows(protocol_ng)
+    parsed = parser.parse_args()
 
+    count = translate((f for f in os.listdir() if f.endswith('.csv')),
+                      parsed.outdir, parsed.jobs, parsed.verbose)
 
-print('\n' + 52 * '#' + '\nprotocols are in ./translated.'
-    '\ntranslated/translated.csv is appended.')
+    print('%d rows translated into %s, all of them in %s' % (
+        count, parsed.outdir, os.path.join(parsed.outdir, 'translated.csv')))
 
 # vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,344 @@
+#!venv/bin/python
+"""
+This module provides a team absence calendar from the protocols of several people
+
+Holidays (`h`) and illness (`i`) entered into a protocol are kept as one
+bitset per person, year and tag, bit `n` set for the `n`-th day of the
+year counted from 0. Absences per day are counted over all people.
+Questions like who is off during a period or how many are available on
+each day are answered by bit operations without reading any protocol.
+
+The index is kept as JSON in one file shared by the team. For every
+person it holds the protocol and the offset up to which it has been read,
+updates read only the rows appended since. A protocol shorter than that
+offset has been rewritten and is read anew.
+"""
+
+import argparse
+import csv
+import datetime
+import fcntl
+import json
+import os
+
+from typing import Iterable, Iterator
+
+import xlsxwriter
+
+# tags of absences and their names
+TAGS = {'h': 'Urlaub', 'i': 'Krankheit'}
+
+DAY = datetime.timedelta(days=1)
+
+
+def get_bit(date: datetime.date) -> int:
+    """return the bit of `date` in the bitsets of its year"""
+
+    return 1 << (date.timetuple().tm_yday - 1)
+
+
+def get_mask(start: datetime.date, end: datetime.date) -> int:
+    """return the bits of the days from `start` to `end`, both of the same year, inclusive"""
+
+    return (get_bit(end) << 1) - get_bit(start)
+
+
+def iter_years(start: datetime.date, end: datetime.date) -> Iterator[tuple]:
+    """yield year, first and last day of every year between `start` and `end` inclusive"""
+
+    for year in range(start.year, end.year + 1):
+        yield year, max(start, datetime.date(year, 1, 1)), min(end, datetime.date(year, 12, 31))
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """yield the indices of the bits set"""
+
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class AbsenceIndex:
+    """
+    Provides queries over the absences of several people
+
+    :param index_file: file the index is kept in, created on :meth:`write`
+    """
+
+    def __init__(self, index_file: str):
+        self.index_file = index_file
+
+        # name to protocol, offset read up to and bitsets by year and tag
+        self.people = {}
+
+        # absent people by year and day of the year, derived from the bitsets
+        self.counts = {}
+
+        try:
+            with open(index_file) as infile:
+                data = json.load(infile)
+        except FileNotFoundError:
+            data = {}
+
+        for name, person in data.items():
+            self.people[name] = {
+                'protocol': person['protocol'],
+                'offset': person['offset'],
+                'years': {int(year): tags for year, tags in person['years'].items()},
+            }
+
+            for year, tags in self.people[name]['years'].items():
+                self._count(year, self._absent(tags), 1)
+
+    @staticmethod
+    def _absent(tags: dict) -> int:
+        bits = 0
+
+        for tag in TAGS:
+            bits |= tags.get(tag, 0)
+
+        return bits
+
+    def _count(self, year: int, bits: int, step: int) -> None:
+        counts = self.counts.setdefault(year, [0] * 366)
+
+        for day in iter_bits(bits):
+            counts[day] += step
+
+    def add(self, name: str, tag: str, date: datetime.date) -> None:
+        """mark `name` absent on `date` for the reason given by `tag`"""
+
+        tags = self.people[name]['years'].setdefault(date.year, {})
+        before = self._absent(tags)
+
+        tags[tag] = tags.get(tag, 0) | get_bit(date)
+
+        # counted once per person and day whatever the reason
+        self._count(date.year, self._absent(tags) & ~before, 1)
+
+    def remove(self, name: str) -> None:
+        """forget the absences of `name`"""
+
+        for year, tags in self.people.pop(name)['years'].items():
+            self._count(year, self._absent(tags), -1)
+
+    def update(self, name: str, protocol_file: str = None) -> int:
+        """
+        read the rows appended to the protocol of `name` since the last update
+
+        :param protocol_file: protocol of `name`, required the first time
+        :return: number of absences read
+        :raises ValueError: when `name` is unknown and no protocol is given
+        """
+
+        # the index is shared, protocols are kept by absolute path
+        protocol_file = protocol_file and os.path.abspath(protocol_file)
+
+        if name not in self.people and not protocol_file:
+            raise ValueError('protocol of %s is unknown' % name)
+
+        if name not in self.people or protocol_file and protocol_file != self.people[name]['protocol']:
+            if name in self.people:
+                self.remove(name)
+
+            self.people[name] = {'protocol': protocol_file, 'offset': 0, 'years': {}}
+
+        person = self.people[name]
+        size = os.path.getsize(person['protocol'])
+
+        # rewritten, start over
+        if size < person['offset']:
+            protocol_file = person['protocol']
+            self.remove(name)
+            self.people[name] = person = {'protocol': protocol_file, 'offset': 0, 'years': {}}
+
+        if size == person['offset']:
+            return 0
+
+        with open(person['protocol'], 'rb') as infile:
+            infile.seek(person['offset'])
+            data = infile.read()
+
+        # only complete lines are read
+        end = data.rfind(b'\n') + 1
+        count = 0
+
+        for row in csv.reader(data[:end].decode().splitlines()):
+            if row and row[0] in TAGS and row[3] and int(row[3]):
+                self.add(name, row[0], datetime.date(int(row[1]), int(row[2]), int(row[3])))
+                count += 1
+
+        person['offset'] += end
+
+        return count
+
+    def update_all(self) -> int:
+        """read the rows appended to all protocols, return number of absences read"""
+
+        return sum(self.update(name) for name in list(self.people))
+
+    def is_absent(self, name: str, date: datetime.date) -> bool:
+        """return whether `name` is absent on `date`"""
+
+        return bool(self._absent(self.people[name]['years'].get(date.year, {})) & get_bit(date))
+
+    def get_absent(self, start: datetime.date, end: datetime.date) -> list:
+        """return the names of the people absent on any day from `start` to `end` inclusive"""
+
+        return sorted(name for name, person in self.people.items()
+                      if any(self._absent(person['years'].get(year, {})) & get_mask(first, last)
+                             for year, first, last in iter_years(start, end)))
+
+    def get_common_absences(self, names: Iterable[str], start: datetime.date, end: datetime.date) -> list:
+        """return the days from `start` to `end` inclusive all of `names` are absent on"""
+
+        days = []
+
+        for year, first, last in iter_years(start, end):
+            bits = get_mask(first, last)
+
+            for name in names:
+                bits &= self._absent(self.people[name]['years'].get(year, {}))
+
+            days.extend(datetime.date(year, 1, 1) + day * DAY for day in iter_bits(bits))
+
+        return days
+
+    def get_available(self, start: datetime.date, end: datetime.date) -> list:
+        """return tuples of every day from `start` to `end` inclusive and the number of people available"""
+
+        available = []
+        date = start
+
+        while date <= end:
+            counts = self.counts.get(date.year)
+            available.append((date, len(self.people) - (counts[date.timetuple().tm_yday - 1] if counts else 0)))
+            date += DAY
+
+        return available
+
+    def add_worksheet(self, workbook: xlsxwriter.Workbook, year: int, name: str = None):
+        """
+        add a calendar sheet of `year`, one row per person and one column per day
+
+        Absences are marked by the first letter of their reason, the last
+        row holds the number of people available.
+
+        :return: the worksheet added
+        """
+
+        bold = workbook.add_format({'bold': True})
+        date_format = workbook.add_format({'num_format': 'd.m.', 'rotation': 90})
+        formats = {
+            'h': workbook.add_format({'bg_color': '#9bc2e6', 'align': 'center'}),
+            'i': workbook.add_format({'bg_color': '#f4b084', 'align': 'center'}),
+        }
+
+        sheet = workbook.add_worksheet(name or 'Abwesenheit %d' % year)
+        sheet.set_column(0, 0, 16)
+        sheet.set_column(1, 366, 3)
+        sheet.freeze_panes(1, 1)
+
+        first = datetime.date(year, 1, 1)
+        days = (datetime.date(year + 1, 1, 1) - first).days
+
+        for day in range(days):
+            sheet.write_datetime(0, day + 1, first + day * DAY, date_format)
+
+        names = sorted(self.people)
+
+        for row_idx, person in enumerate(names, 1):
+            sheet.write_string(row_idx, 0, person, bold)
+            tags = self.people[person]['years'].get(year, {})
+
+            for tag in TAGS:
+                for day in iter_bits(tags.get(tag, 0)):
+                    sheet.write_string(row_idx, day + 1, TAGS[tag][0], formats[tag])
+
+        row_idx = len(names) + 1
+        sheet.write_string(row_idx, 0, 'Verfügbar', bold)
+        counts = self.counts.get(year, [0] * 366)
+
+        for day in range(days):
+            sheet.write_number(row_idx, day + 1, len(names) - counts[day])
+
+        return sheet
+
+    def write(self) -> 'AbsenceIndex':
+        """write the index, replacing the former one at once"""
+
+        tmp_file = self.index_file + '.tmp'
+
+        with open(tmp_file, 'w') as outfile:
+            json.dump(self.people, outfile, separators=(',', ':'))
+
+        os.replace(tmp_file, self.index_file)
+
+        return self
+
+
+def parse_date(value: str) -> datetime.date:
+    """return a date given as YYYY-MM-DD"""
+
+    return datetime.date.fromisoformat(value)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='team absence calendar from Tick protocols')
+    parser.add_argument('--index', '-i', default='absence.json', help='index file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help='read rows appended to the protocols')
+    update_parser.add_argument('name', nargs='?', help='person to update, all if omitted')
+    update_parser.add_argument('protocol_file', nargs='?', help='protocol of the person, required the first time')
+
+    absent_parser = subparsers.add_parser('absent', help='list the people absent during a period')
+    available_parser = subparsers.add_parser('available', help='print the number of people available per day')
+
+    for period_parser in (absent_parser, available_parser):
+        period_parser.add_argument('start', type=parse_date, help='first day, YYYY-MM-DD')
+        period_parser.add_argument('end', type=parse_date, help='last day, YYYY-MM-DD')
+
+    export_parser = subparsers.add_parser('export', help='write calendar sheets to a workbook')
+    export_parser.add_argument('years', type=int, nargs='+', help='years to export')
+    export_parser.add_argument('--output', '-o', default='absence.xlsx', help='workbook to write')
+
+    parsed = parser.parse_args()
+
+    if parsed.command == 'update':
+        # the index is shared, updates are serialized
+        with open(parsed.index + '.lock', 'w') as lockfile:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+            index = AbsenceIndex(parsed.index)
+
+            if parsed.name:
+                count = index.update(parsed.name, parsed.protocol_file)
+            else:
+                count = index.update_all()
+
+            index.write()
+
+        print('%d absences added' % count)
+        exit(0)
+
+    index = AbsenceIndex(parsed.index)
+
+    if parsed.command == 'absent':
+        for name in index.get_absent(parsed.start, parsed.end):
+            print(name)
+
+    elif parsed.command == 'available':
+        for date, count in index.get_available(parsed.start, parsed.end):
+            print('%s %d' % (date.isoformat(), count))
+
+    elif parsed.command == 'export':
+        with xlsxwriter.Workbook(parsed.output) as workbook:
+            for year in parsed.years:
+                index.add_worksheet(workbook, year)
+
+        print('Workbook written to %s' % parsed.output)
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
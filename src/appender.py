@@ -0,0 +1,154 @@
+#!venv/bin/python
+"""
+This module provides locked appending to the protocol
+
+Writers put their rows into a spool next to the protocol and commit.
+A commit takes an advisory lock on the protocol and moves all rows
+pending in the spool into it with a single write followed by `fsync`.
+Rows spooled by other writers while a commit holds the lock are carried
+by the next one (group commit), so a commit may carry more or fewer rows
+than its writer spooled.
+
+Before writing to the protocol a commit puts a marker holding the size
+of the protocol and the number of bytes to be written in front of the
+spool. Should it crash before emptying the spool, the next commit finds
+the marker and writes only what is missing from the protocol.
+"""
+
+import argparse
+import fcntl
+import os
+import sys
+
+from typing import Union
+
+from recent import RecentIndex
+
+# starts the line in front of the spool marking a commit in progress
+MARKER = b'#commit '
+
+
+def get_spool_file(protocol_file: str) -> str:
+    """return the path of the spool belonging to `protocol_file`"""
+
+    return protocol_file + '.spool'
+
+
+def format_row(row: Union[list, tuple]) -> str:
+    """
+    return a protocol row as line in the format written by the controller
+
+    :param row: tag, year, month, day, duration, from unixtime, to unixtime and description.
+        None for empty fields.
+    """
+
+    tag, year, month, day, duration, from_unixtime, to_unixtime, description = row
+
+    # month and day are zero padded as by `date +%m,%d`
+    return '%s,%d,%02d,%s,%s,%s,%s,"%s"\n' % (
+        tag, year, month, '%02d' % day if day else '0',
+        *('' if field is None else str(field) for field in (duration, from_unixtime, to_unixtime)),
+        (description or '').replace('"', '""'))
+
+
+def spool(protocol_file: str, lines: Union[list, tuple]) -> None:
+    """
+    put lines into the spool of `protocol_file`
+
+    :param lines: complete `csv` lines, newline terminated
+    """
+
+    with open(get_spool_file(protocol_file), 'a') as spoolfile:
+        fcntl.flock(spoolfile, fcntl.LOCK_EX)
+        spoolfile.writelines(lines)
+
+
+def commit(protocol_file: str) -> int:
+    """
+    move all lines pending in the spool into the protocol
+
+    :return: number of rows carried by this commit
+    """
+
+    with open(protocol_file, 'ab') as outfile:
+        fcntl.flock(outfile, fcntl.LOCK_EX)
+
+        try:
+            spoolfile = open(get_spool_file(protocol_file), 'rb+')
+        except FileNotFoundError:
+            return 0
+
+        with spoolfile:
+            # the spool stays locked until its lines are safe
+            fcntl.flock(spoolfile, fcntl.LOCK_EX)
+
+            pending = spoolfile.read()
+
+            # a commit crashed, what it wrote already is not written twice
+            if pending.startswith(MARKER):
+                marker, pending = pending.split(b'\n', 1)
+                offset, length = map(int, marker[len(MARKER):].split())
+
+                with open(protocol_file, 'rb') as infile:
+                    infile.seek(offset)
+                    written = infile.read(length)
+
+                if pending[:length].startswith(written):
+                    pending = pending[len(written):]
+
+            if not pending:
+                spoolfile.truncate(0)
+                return 0
+
+            # the marker goes to disk before the rows
+            spoolfile.seek(0)
+            spoolfile.write(b'%s%d %d\n' % (MARKER, os.fstat(outfile.fileno()).st_size, len(pending)))
+            spoolfile.write(pending)
+            spoolfile.truncate()
+            spoolfile.flush()
+            os.fsync(spoolfile.fileno())
+
+            outfile.write(pending)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+
+            spoolfile.truncate(0)
+
+    return pending.count(b'\n')
+
+
+def append(protocol_file: str, rows: Union[list, tuple]) -> int:
+    """
+    append rows to the protocol
+
+    :param rows: rows as accepted by :func:`format_row`
+    :return: number of rows carried by the commit
+    """
+
+    spool(protocol_file, [format_row(row) for row in rows])
+
+    return commit(protocol_file)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='append lines read from stdin to a Tick protocol')
+    parser.add_argument('protocol_file', help='protocol to append to')
+    parser.add_argument('--quiet', '-q', action='store_true', help='do not report the commit')
+
+    parsed = parser.parse_args()
+
+    lines = [line if line.endswith('\n') else line + '\n' for line in sys.stdin if line.strip()]
+
+    if lines:
+        spool(parsed.protocol_file, lines)
+
+    rows = commit(parsed.protocol_file)
+
+    # keep the index for completion up to date
+    RecentIndex(parsed.protocol_file).update()
+
+    if not parsed.quiet:
+        print('%d row%s committed' % (rows, '' if rows == 1 else 's'))
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
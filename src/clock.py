@@ -0,0 +1,65 @@
+"""
+This module provides the conversion of epoch values to local time for a month
+
+The UTC offset of every local day of the month is determined once.
+Epoch values on days with a constant offset are converted by arithmetic,
+those on days with a DST transition or outside the month fall back to
+:meth:`datetime.datetime.fromtimestamp`. Results are cached so renderers
+sharing a clock convert each value once.
+"""
+
+import bisect
+import calendar
+import datetime
+import time
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class LocalClock:
+    """
+    Provides local :class:`datetime.datetime` for epoch values of a month
+
+    :param year: year of the month
+    :param month: month
+    """
+
+    def __init__(self, year: int, month: int):
+        days = calendar.monthrange(year, month)[1]
+
+        # epoch of local midnight of every day and the one following the month
+        self.starts = [int(time.mktime((year, month, day, 0, 0, 0, 0, 0, -1))) for day in range(1, days + 1)]
+        following = datetime.date(year, month, days) + datetime.timedelta(days=1)
+        self.starts.append(int(time.mktime(following.timetuple()[:8] + (-1,))))
+
+        # offset of every day, None if it changes during the day
+        offsets = [time.localtime(start).tm_gmtoff for start in self.starts]
+        self.offsets = [offsets[day] if offsets[day] == offsets[day + 1] else None for day in range(days)]
+
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, epoch: int) -> datetime.datetime:
+        """return local time of `epoch`"""
+
+        try:
+            local = self.cache[epoch]
+            self.hits += 1
+            return local
+        except KeyError:
+            self.misses += 1
+
+        day = bisect.bisect_right(self.starts, epoch) - 1
+        offset = self.offsets[day] if 0 <= day < len(self.offsets) else None
+
+        if offset is None:
+            local = datetime.datetime.fromtimestamp(epoch)
+        else:
+            local = EPOCH + datetime.timedelta(seconds=epoch + offset)
+
+        self.cache[epoch] = local
+
+        return local
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
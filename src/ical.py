@@ -0,0 +1,175 @@
+"""
+This module provides the import of iCalendar events into the protocol
+
+Events are streamed from a local :file:`.ics` file and mapped to rows:
+
+- events categorized or summarized as holiday become `h` rows, one per working day
+- events categorized or summarized as illness become `i` rows, one per working day
+- all other events become `e` rows, with from and to if they have a time
+
+Times given in UTC are converted, all others are taken as local time.
+"""
+
+import calendar
+import datetime
+import re
+import time
+
+from typing import Iterable, Iterator
+
+from workdays import FIRST_YEAR, LAST_YEAR, get_calendar
+
+# words in categories or summary leading to a tag other than `e`
+TAG_WORDS = (
+    ('h', re.compile(r'urlaub|holiday|vacation', re.IGNORECASE)),
+    ('i', re.compile(r'krank|illness|sick', re.IGNORECASE)),
+)
+
+# descriptions used by :program:`vacation`
+TAG_DESCRIPTIONS = {'h': 'Urlaub', 'i': 'Krankheit'}
+
+DAY = datetime.timedelta(days=1)
+
+
+def unfold(lines: Iterable[str]) -> Iterator[str]:
+    """yield content lines, joining those folded"""
+
+    current = None
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+
+        if current is not None:
+            yield current
+
+        current = line
+
+    if current is not None:
+        yield current
+
+
+def unescape(value: str) -> str:
+    """return a TEXT value unescaped"""
+
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    yield the events of an iCalendar stream
+
+    :return: dicts of property names to tuples of parameters and value
+    """
+
+    event = None
+
+    for line in unfold(lines):
+        name, _, value = line.partition(':')
+        name, *params = name.split(';')
+        name = name.upper()
+
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {}
+        elif name == 'END' and value.upper() == 'VEVENT':
+            if event is not None:
+                yield event
+            event = None
+        elif event is not None and name not in event:
+            event[name] = (dict(param.split('=', 1) for param in params if '=' in param), value)
+
+
+def parse_datetime(params: dict, value: str):
+    """
+    return a DATE or DATE-TIME value
+
+    :return: :class:`datetime.date` for dates, epoch for date-times
+    """
+
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+
+    t = (int(value[:4]), int(value[4:6]), int(value[6:8]),
+         int(value[9:11]), int(value[11:13]), int(value[13:15] or 0))
+
+    if value.endswith('Z'):
+        return calendar.timegm(t + (0, 0, 0))
+
+    return int(time.mktime(t + (0, 0, -1)))
+
+
+def get_tag(event: dict) -> str:
+    """return the tag an event is mapped to"""
+
+    text = ' '.join(event[name][1] for name in ('CATEGORIES', 'SUMMARY') if name in event)
+
+    for tag, words in TAG_WORDS:
+        if words.search(text):
+            return tag
+
+    return 'e'
+
+
+def event_to_rows(event: dict, state: str = None) -> list:
+    """
+    map an event to protocol rows
+
+    :param state: state whose working days are taken for holiday
+        and illness rows, all weekdays if None
+    :return: list of rows as accepted by :func:`appender.format_row`
+    """
+
+    if 'DTSTART' not in event:
+        return []
+
+    tag = get_tag(event)
+    description = unescape(event['SUMMARY'][1]) if 'SUMMARY' in event else TAG_DESCRIPTIONS.get(tag, '')
+
+    # a row is one line of the protocol
+    description = re.sub(r'[\r\n]+', ' ', description)
+
+    start = parse_datetime(*event['DTSTART'])
+    end = parse_datetime(*event['DTEND']) if 'DTEND' in event else None
+
+    # timed event
+    if not isinstance(start, datetime.date):
+        if tag == 'e' and end and end > start:
+            date = datetime.date.fromtimestamp(start)
+            return [('e', date.year, date.month, date.day, end - start, start, end, description)]
+
+        start = datetime.date.fromtimestamp(start)
+        end = datetime.date.fromtimestamp(end - 1) + DAY if end else None
+
+    # all-day event, end is exclusive, a working day is
+    # entered for each day off from or spent at work
+    end = end if isinstance(end, datetime.date) and end > start else start + DAY
+
+    rows = []
+    day = start
+
+    while day < end:
+        if _is_working_day(day, state):
+            rows.append((tag, day.year, day.month, day.day, None, None, None,
+                         TAG_DESCRIPTIONS.get(tag, description)))
+        day += DAY
+
+    return rows
+
+
+def _is_working_day(day: datetime.date, state: str) -> bool:
+    if state and FIRST_YEAR <= day.year <= LAST_YEAR:
+        return get_calendar(state).is_working_day(day)
+
+    return day.weekday() < 5
+
+
+def iter_rows(lines: Iterable[str], state: str = None) -> Iterator[tuple]:
+    """yield protocol rows for all events of an iCalendar stream"""
+
+    for event in iter_events(lines):
+        yield from event_to_rows(event, state)
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
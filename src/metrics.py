@@ -0,0 +1,168 @@
+"""
+This module provides metrics of Tick in the OpenMetrics text format
+
+Metrics are collected in memory while a command runs and written to a
+file read by a textfile collector, e.g. the one of the node exporter.
+Counters and histograms accumulate over runs, so writing adds the values
+collected to those read from the file, gauges are replaced. The file is
+written to a temporary file renamed into place under a lock, collectors
+never read a partial file and concurrent runs do not lose counts.
+"""
+
+import fcntl
+import os
+import re
+import time
+
+from contextlib import contextmanager
+
+# stage latency buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# metric families: name to type and help
+FAMILIES = {
+    'tick_stage_duration_seconds': ('histogram', 'Duration of the stages of a command'),
+    'tick_runs': ('counter', 'Commands run'),
+    'tick_rows_parsed': ('counter', 'Protocol rows parsed'),
+    'tick_months_built': ('gauge', 'Months built by the last parse'),
+    'tick_protocol_bytes': ('gauge', 'Size of the protocol'),
+    'tick_cache_lookups': ('counter', 'Cache lookups by result'),
+}
+
+
+def format_labels(labels: dict) -> str:
+    """return labels as written in a sample, empty if there are none"""
+
+    if not labels:
+        return ''
+
+    return '{%s}' % ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                             for key, value in labels.items())
+
+
+def format_value(value: float) -> str:
+    """return a sample value, integers without fraction"""
+
+    return '%d' % value if value == int(value) else repr(float(value))
+
+
+def format_bound(bound: float) -> str:
+    """return the upper bound of a bucket in canonical form, e.g. `1.0` or `+Inf`"""
+
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class Metrics:
+    """
+    Provides collecting metrics and writing them to a textfile
+
+    :param path: file to write to, nothing is written if None
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+
+        # values by family and sample
+        self.samples = {name: {} for name in FAMILIES}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """add to a counter"""
+
+        sample = name + '_total' + format_labels(labels)
+        self.samples[name][sample] = self.samples[name].get(sample, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """set a gauge"""
+
+        self.samples[name][name + format_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """observe a value in a histogram"""
+
+        samples = self.samples[name]
+
+        for bound in BUCKETS + (float('inf'),):
+            sample = name + '_bucket' + format_labels(dict(labels, le=format_bound(bound)))
+            samples[sample] = samples.get(sample, 0) + (value <= bound)
+
+        for suffix, add in (('_count', 1), ('_sum', value)):
+            sample = name + suffix + format_labels(labels)
+            samples[sample] = samples.get(sample, 0) + add
+
+    @contextmanager
+    def timer(self, command: str, stage: str):
+        """observe the duration of the block as stage of a command"""
+
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe('tick_stage_duration_seconds', time.perf_counter() - started,
+                         command=command, stage=stage)
+
+    def read(self) -> dict:
+        """return the samples of the file by family, empty if there is none"""
+
+        samples = {name: {} for name in FAMILIES}
+
+        try:
+            with open(self.path) as infile:
+                for line in infile:
+                    if line.startswith('#') or not line.strip():
+                        continue
+
+                    sample, value = line.rstrip('\n').rsplit(' ', 1)
+
+                    # buckets written before bounds were canonical
+                    sample = re.sub(r'le="([0-9.]+)"', lambda m: 'le="%s"' % format_bound(float(m.group(1))), sample)
+                    name = sample.split('{', 1)[0]
+
+                    for family in FAMILIES:
+                        if name.startswith(family):
+                            samples[family][sample] = float(value)
+                            break
+
+        except FileNotFoundError:
+            pass
+
+        return samples
+
+    def write(self) -> None:
+        """add the metrics collected to those of the file and replace it"""
+
+        if not self.path:
+            return
+
+        with open(self.path + '.lock', 'w') as lockfile:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+            samples = self.read()
+
+            for name, (kind, _) in FAMILIES.items():
+                for sample, value in self.samples[name].items():
+                    if kind == 'gauge':
+                        samples[name][sample] = value
+                    else:
+                        samples[name][sample] = samples[name].get(sample, 0) + value
+
+            lines = []
+
+            for name, (kind, description) in FAMILIES.items():
+                if not samples[name]:
+                    continue
+
+                lines.append('# TYPE %s %s\n' % (name, kind))
+                lines.append('# HELP %s %s\n' % (name, description))
+                lines.extend('%s %s\n' % (sample, format_value(value)) for sample, value in samples[name].items())
+
+            lines.append('# EOF\n')
+
+            tmp_file = self.path + '.tmp'
+
+            with open(tmp_file, 'w') as outfile:
+                outfile.writelines(lines)
+
+            os.replace(tmp_file, self.path)
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
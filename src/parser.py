@@ -5,19 +5,37 @@ parser for :program:`tick`
 
 import argparse
 
-from typing import Union
+from typing import Union, Iterable
 
 from version import VERSION
 
+import io
+import os
 import sys
-import csv
-from protocol import Month
+import json
+import time
+import hashlib
+import itertools
+import queue
+import threading
+from protocol import Month, LazyMonth
 
 import xlsxwriter
 from pathlib import Path
-
-
-def parse_csv_protocol(protocol: Union[list, tuple], state: str) -> dict:
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+from render import render, TextSink, XlsxSink, BalanceSink, NdjsonSink, CsvSummarySink
+from rowindex import RowIndex, get_key
+from records import RecordReader, is_records_file, iter_typed_rows
+from fastcsv import iter_rows
+from summary import Summary, merge
+from metrics import Metrics
+import appender
+import ical
+import socket
+
+
+def parse_csv_protocol(protocol: Union[list, tuple], state: str, exact_target: bool = False) -> dict:
     """
     parse a list of `csv` protocol entries into year. return year.
 
@@ -28,31 +46,40 @@ def parse_csv_protocol(protocol: Union[list, tuple], state: str) -> dict:
 
     :param protocol: protocol to parse
     :param state: state based on which workdays are calculated by protocol
+    :param exact_target: base monthly targets on the working days of each month
     :return: a dict containing years containing instances of protocol.Month
 
     """
 
+    return build_months(iter_typed_rows(protocol), state, exact_target)
+
+
+def build_months(rows: Iterable[tuple], state: str, exact_target: bool = False, month_class: type = Month) -> dict:
+    """
+    build the chain of Months from typed protocol rows
+
+    :param rows: tag, year, month, day, duration, from unixtime, to unixtime and
+        description, None for empty fields, as yielded by :func:`records.iter_typed_rows`
+        or :class:`records.RecordReader`
+    :param state: state based on which workdays are calculated by protocol
+    :param exact_target: base monthly targets on the working days of each month
+    :param month_class: :class:`protocol.Month` or a subclass like :class:`protocol.LazyMonth`
+    :return: a dict containing years containing instances of `month_class`
+    """
+
     # first sort month and year, leafs are protocol lists
     # as they are found in the csv
     sorted_protocol = {}
 
-    for entry in protocol:
-
-        # adjust types
-        for i in range(1, 7):
-            entry[i] = int(entry[i]) if entry[i] else None
+    for tag, year, month, *entry in rows:
 
-        # year and month are at position 1 and 2
-        # we don’t need them anymore after retrieval
-        year = int(entry.pop(1))
         if year not in sorted_protocol:
             sorted_protocol[year] = {}
 
-        month = int(entry.pop(1))
         if month not in sorted_protocol[year]:
             sorted_protocol[year][month] = []
 
-        sorted_protocol[year][month].append(entry)
+        sorted_protocol[year][month].append((tag, *entry))
 
     # now fill that into a dict with instances of
     # protocol.Month as leafs 
@@ -65,8 +92,8 @@ def parse_csv_protocol(protocol: Union[list, tuple], state: str) -> dict:
                 sorted_years[year] = {}
 
             if not month in sorted_years[year]:
-                sorted_years[year][month] = former.get_next(month=month, year=year) if former else Month(
-                    month=int(month), year=int(year), state=state)
+                sorted_years[year][month] = former.get_next(month=month, year=year) if former else month_class(
+                    month=int(month), year=int(year), state=state, exact_target=exact_target)
 
             sorted_years[year][month].append_protocol(sorted_protocol[year][month])
             former = sorted_years[year][month]
@@ -74,6 +101,637 @@ def parse_csv_protocol(protocol: Union[list, tuple], state: str) -> dict:
     return sorted_years
 
 
+def _parse_csv_chunk(csv_file: str, start: int, end: int, state: str, exact_target: bool) -> list:
+    """
+    build partial Months from the lines of `csv_file` starting in the byte range [start, end)
+
+    Months start with empty balances. Carryovers are returned separately
+    in order of appearance so carried balances can be filled in exactly
+    as :meth:`protocol.Month.get_next` followed by appending would do.
+    Months are returned as :class:`protocol.MonthPart`, lists of fields
+    pickle to about half the size of one dict per entry.
+
+    :return: list of tuples of year, month, part of the Month and carryovers
+        in order of appearance
+    """
+
+    partials = {}
+
+    with open(csv_file, 'rb') as infile:
+        # the line crossing start belongs to the chunk before
+        if start:
+            infile.seek(start - 1)
+            infile.readline()
+
+        # the range at once, completed by the line crossing end
+        data = infile.read(max(0, end - infile.tell()))
+        if data and not data.endswith(b'\n'):
+            data += infile.readline()
+
+    # newlines as read by open()
+    for tag, year, month, *entry in iter_rows(io.StringIO(data.decode(), newline=None)):
+
+        if (year, month) not in partials:
+            partials[(year, month)] = (Month(month=month, year=year, state=state, exact_target=exact_target), [])
+
+        partial, carryovers = partials[(year, month)]
+
+        partial.append(tag, *entry)
+
+        if tag == 'c' and not entry[0]:
+            carryovers.append(partial.protocol[-1]['duration'])
+
+    return [(year, month, partial.get_part(), carryovers) for (year, month), (partial, carryovers) in partials.items()]
+
+
+def parse_csv_protocol_parallel(csv_file: str, state: str, exact_target: bool = False,
+                                jobs: int = None, chunk_size: int = 1 << 20) -> dict:
+    """
+    parse a `csv` protocol file into years using several processes
+
+    Byte ranges of the file are parsed into partial Months by worker processes.
+    Their parts are merged into Months in file order and the balances carried
+    from month to month are filled in by a sequential scan afterwards.
+    The result equals that of :func:`parse_csv_protocol`.
+
+    :param csv_file: path of the protocol
+    :param state: state based on which workdays are calculated by protocol
+    :param exact_target: base monthly targets on the working days of each month
+    :param jobs: number of worker processes, number of CPUs if omitted
+    :param chunk_size: minimal size in bytes of a chunk
+    :return: a dict containing years containing instances of protocol.Month
+    """
+
+    size = os.path.getsize(csv_file)
+    jobs = jobs or os.cpu_count()
+
+    # a few chunks per worker to balance the load
+    chunk_size = max(chunk_size, size // (jobs * 4) + 1)
+    ranges = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        chunks = executor.map(_parse_csv_chunk,
+                              *zip(*((csv_file, start, end, state, exact_target) for start, end in ranges)))
+
+        # merge parts in file order
+        merged = {}
+
+        for chunk in chunks:
+            for year, month, part, carryovers in chunk:
+                if (year, month) not in merged:
+                    merged[(year, month)] = (Month(month=month, year=year, state=state, exact_target=exact_target), [])
+
+                current, current_carryovers = merged[(year, month)]
+                current.merge_part(part)
+                current_carryovers.extend(carryovers)
+
+    # carry the balances
+    sorted_years = {}
+    former = None
+
+    for year, month in sorted(merged):
+        current, carryovers = merged[(year, month)]
+
+        if former:
+            current.holidays_left_begin += former.holidays_left
+
+        current.working_hours_account_begin = former.working_hours_balance if former else 0
+
+        for carryover in carryovers:
+            current.working_hours_account_begin += carryover
+
+        sorted_years.setdefault(year, {})[month] = current
+        former = current
+
+    return sorted_years
+
+
+class UnsortedProtocolException(Exception):
+    pass
+
+
+def is_sorted_by_month(rows: Iterable[tuple]) -> bool:
+    """
+    tell whether the rows of a protocol are in ascending order of months
+
+    :param rows: typed rows as yielded by :func:`fastcsv.iter_rows` or :class:`records.RecordReader`
+    """
+
+    last = None
+
+    for row in rows:
+        current = (row[1], row[2])
+
+        if last and current < last:
+            return False
+
+        last = current
+
+    return True
+
+
+def iter_export_records(rows: Iterable[tuple], state: str, exact_target: bool = False):
+    """
+    yield one record per entry of a protocol sorted by month
+
+    The chain of Months is built while iterating and only the Month
+    on top is held so the protocol is exported in constant memory.
+    Records contain the working hours account and the holidays left
+    after the entry.
+
+    :param rows: typed rows in ascending order of months as yielded by
+        :func:`fastcsv.iter_rows` or :class:`records.RecordReader`
+    :param state: state based on which workdays are calculated
+    :param exact_target: base monthly targets on the working days of each month
+    :raises UnsortedProtocolException: when a month precedes the one on top
+    """
+
+    month = None
+
+    for tag, year, m, *entry in rows:
+        if not month:
+            month = Month(month=m, year=year, state=state, exact_target=exact_target)
+
+        elif (year, m) > (month.year, month.month):
+            month = month.get_next(month=m, year=year)
+
+        elif (year, m) < (month.year, month.month):
+            raise UnsortedProtocolException('%d-%02d follows %d-%02d' % (year, m, month.year, month.month))
+
+        month.append(tag, *entry)
+        entry = month.protocol[-1]
+
+        yield {
+            'year': month.year,
+            'month': month.month,
+            'date': month.resolve(entry)['date'].isoformat() if entry['day'] else None,
+            'tag': entry['tag'],
+            'duration': entry['duration'],
+            'description': entry['description'],
+            'working_hours_account': month.working_hours_account,
+            'holidays_left': month.holidays_left,
+        }
+
+
+def get_fingerprint(months: dict) -> str:
+    """
+    return a fingerprint of the months of a year
+
+    The fingerprint covers everything rendered, entries as well as
+    balances carried into the year, and the version of Tick.
+
+    :param months: dict of months containing instances of protocol.Month
+    """
+
+    fingerprint = hashlib.sha1(VERSION.encode())
+
+    for m in sorted(months):
+        fingerprint.update(json.dumps(months[m].dump(), sort_keys=True).encode())
+
+    return fingerprint.hexdigest()
+
+
+def write_year_workbooks(years: dict, xlsx_outfile: Path, current_year: int = None) -> list:
+    """
+    write one workbook per year and an index workbook
+
+    Workbooks of closed years are written only if they are missing or
+    their fingerprint changed, fingerprints are kept next to `xlsx_outfile`.
+    The index workbook at `xlsx_outfile` lists every year with its
+    workbook and closing balances.
+
+    :param years: dict of years as returned by :func:`parse_csv_protocol`
+    :param xlsx_outfile: index workbook, yearly ones are named <stem>-<year>.xlsx
+    :param current_year: first year still open, the current one if omitted
+    :return: paths of the workbooks written
+    """
+
+    current_year = current_year or time.localtime().tm_year
+    fingerprint_file = xlsx_outfile.with_suffix('.fingerprints')
+
+    try:
+        with fingerprint_file.open() as infile:
+            fingerprints = json.load(infile)
+    except (FileNotFoundError, ValueError):
+        fingerprints = {}
+
+    written = []
+
+    for y in sorted(years):
+        outfile = xlsx_outfile.with_name('%s-%d.xlsx' % (xlsx_outfile.stem, y))
+        fingerprint = get_fingerprint(years[y])
+
+        if y < current_year and fingerprints.get(str(y)) == fingerprint and outfile.exists():
+            continue
+
+        with xlsxwriter.Workbook(str(outfile)) as workbook:
+            render({y: years[y]}, (XlsxSink(workbook), BalanceSink(workbook)))
+
+        fingerprints[str(y)] = fingerprint
+        written.append(str(outfile))
+
+    with xlsxwriter.Workbook(str(xlsx_outfile)) as workbook:
+        formats = Month.get_worksheet_formats(workbook)
+
+        sheet = workbook.add_worksheet('Übersicht')
+        sheet.set_column('B:B', 24)
+        sheet.write_row(0, 0, ('Jahr', 'Datei', 'Arbeitsstunden', 'Konto', 'Urlaub'), formats['bold'])
+
+        for row_idx, y in enumerate(sorted(years, reverse=True), 1):
+            last = years[y][max(years[y])]
+            name = '%s-%d.xlsx' % (xlsx_outfile.stem, y)
+
+            sheet.write_number(row_idx, 0, y)
+            sheet.write_url(row_idx, 1, 'external:' + name, string=name)
+            sheet.write_number(row_idx, 2, sum(m.working_hours for m in years[y].values()) / 3600,
+                               formats['duration'])
+            sheet.write_number(row_idx, 3, last.working_hours_balance / 3600, formats['duration'])
+            sheet.write_number(row_idx, 4, last.holidays_left, formats['holiday'])
+
+    written.append(str(xlsx_outfile))
+
+    with fingerprint_file.open('w') as outfile:
+        json.dump(fingerprints, outfile)
+
+    return written
+
+
+def write_workbook(years: dict, xlsx_outfile: str) -> list:
+    """
+    write the years to a workbook with a sheet of the balance
+
+    :return: paths of the workbooks written
+    """
+
+    with xlsxwriter.Workbook(xlsx_outfile) as workbook:
+        render(years, (XlsxSink(workbook), BalanceSink(workbook)))
+
+    return [xlsx_outfile]
+
+
+class _Stage(threading.Thread):
+    """run a function in a thread keeping its result, exception and duration"""
+
+    def __init__(self, name: str, function, *args):
+        super().__init__(name=name, daemon=True)
+        self.function = function
+        self.args = args
+        self.result = None
+        self.error = None
+        self.elapsed = 0
+
+    def run(self):
+        started = time.perf_counter()
+
+        try:
+            self.result = self.function(*self.args)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.elapsed = time.perf_counter() - started
+
+    def get(self):
+        """return the result once the stage is done, raise its exception if any"""
+
+        self.join()
+
+        if self.error:
+            raise self.error
+
+        return self.result
+
+
+def _put(batches: queue.Queue, stop: threading.Event, batch) -> bool:
+    # put a batch unless stopped while the queue is full
+    while not stop.is_set():
+        try:
+            batches.put(batch, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+
+    return False
+
+
+def _decode(csv_file: str, batches: queue.Queue, stop: threading.Event, batch_size: int) -> None:
+    # put batches of typed rows, None when done, nothing more once stopped
+    try:
+        with ExitStack() as stack:
+            if is_records_file(csv_file):
+                rows = stack.enter_context(RecordReader(csv_file))
+            else:
+                rows = iter_rows(stack.enter_context(open(csv_file)))
+
+            batch = []
+
+            for row in rows:
+                batch.append(row)
+
+                if len(batch) == batch_size:
+                    if not _put(batches, stop, batch):
+                        return
+
+                    batch = []
+
+            if batch:
+                _put(batches, stop, batch)
+    finally:
+        _put(batches, stop, None)
+
+
+def _build(batches: queue.Queue, state: str, exact_target: bool) -> dict:
+    # build Months while rows arrive, all at once if they are not sorted
+    consumed = []
+    sorted_years = {}
+    month = None
+
+    while True:
+        batch = batches.get()
+
+        if batch is None:
+            return sorted_years
+
+        consumed.append(batch)
+
+        for tag, year, m, *entry in batch:
+            if not month or (year, m) > (month.year, month.month):
+                month = month.get_next(month=m, year=year) if month else Month(
+                    month=m, year=year, state=state, exact_target=exact_target)
+                sorted_years.setdefault(year, {})[m] = month
+
+            elif (year, m) != (month.year, month.month):
+                rest = iter(batches.get, None)
+                return build_months(itertools.chain.from_iterable(itertools.chain(consumed, rest)),
+                                    state, exact_target)
+
+            month.append(tag, *entry)
+
+
+def parse_pipelined(csv_file: str, state: str, exact_target: bool = False, write_workbook=None,
+                    sinks: tuple = (), queue_size: int = 16, batch_size: int = 1024) -> tuple:
+    """
+    parse a protocol file and render it in stages running in threads
+
+    - `decode`: rows are read and typed, records files are mapped
+    - `build`: Months are built from batches of rows passed by a bounded queue
+    - `xlsx`: workbooks are rendered, compressed and written by `write_workbook`
+    - `render`: `sinks` are fed
+
+    Decoding and building overlap. Rendering waits for the chain of Months to be
+    complete since the output starts with the latest Month, whose balances depend
+    on all others. Workbooks and the other outputs are rendered side by side, so
+    compressing and writing a workbook overlaps with rendering the rest.
+    The output equals that of :func:`parse_csv_protocol` followed by :func:`render`.
+
+    :param csv_file: path of the protocol or a records file
+    :param state: state based on which workdays are calculated by protocol
+    :param exact_target: base monthly targets on the working days of each month
+    :param write_workbook: function taking the years and returning the paths of the
+        workbooks written, e.g. :func:`write_workbook`, none are written if omitted
+    :param sinks: instances of :class:`render.Sink` fed besides the workbooks
+    :param queue_size: number of batches the queue holds at most
+    :param batch_size: number of rows passed at once
+    :return: a dict containing years containing instances of protocol.Month,
+        the paths of the workbooks written and a dict of seconds spent per stage
+    """
+
+    started = time.perf_counter()
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    decode = _Stage('decode', _decode, csv_file, batches, stop, batch_size)
+    build = _Stage('build', _build, batches, state, exact_target)
+    decode.start()
+    build.start()
+
+    # the rows end early if decoding failed, it is done once building is
+    try:
+        years = build.get()
+    except BaseException:
+        # nobody takes the batches anymore
+        stop.set()
+        decode.join()
+        raise
+
+    decode.get()
+    stages = [decode, build]
+
+    if write_workbook:
+        xlsx = _Stage('xlsx', write_workbook, years)
+        xlsx.start()
+        stages.append(xlsx)
+
+    render_started = time.perf_counter()
+    render(years, sinks)
+    render_elapsed = time.perf_counter() - render_started
+
+    workbooks = xlsx.get() if write_workbook else []
+
+    timings = {stage.name: stage.elapsed for stage in stages}
+    timings['render'] = render_elapsed
+    timings['total'] = time.perf_counter() - started
+
+    return years, workbooks, timings
+
+
+class ProtocolWatcher:
+    """
+    keep the text and excel output of a protocol up to date while it grows
+
+    Only the bytes appended since the last poll are read and fed to the
+    Month on top. Entries for a month before the one on top, truncation
+    and in-place edits lead to a full re-parse.
+
+    The textfile is assembled from cached blocks so only the months
+    touched are rendered again. `xlsxwriter` cannot update a workbook in place
+    and rewriting it takes time growing with the history, so the workbook is
+    rewritten by :meth:`flush` from the Months held once the protocol settled,
+    outside of polling.
+
+    :param csv_file: protocol to watch
+    :param state: state based on which workdays are calculated
+    :param xlsx_outfile: workbook to keep up to date
+    :param txt_outfile: textfile to keep up to date
+    :param exact_target: base monthly targets on the working days of each month
+    """
+
+    # number of bytes before the offset compared to detect in-place edits
+    guard_size = 64
+
+    def __init__(self, csv_file: str, state: str, xlsx_outfile: str, txt_outfile: str,
+                 exact_target: bool = False):
+        self.csv_file = csv_file
+        self.state = state
+        self.exact_target = exact_target
+        self.xlsx_outfile = xlsx_outfile
+        self.txt_outfile = txt_outfile
+
+        self.year = {}
+        self.blocks = {}
+        self.top = None
+
+        # time of the first change not yet in the workbook
+        self.changed = None
+
+        # bytes consumed so far, the last of them and the stat seen
+        self.offset = 0
+        self.guard = b''
+        self.stat = None
+
+    def parse(self) -> 'ProtocolWatcher':
+        """parse the whole protocol and write all output"""
+
+        with open(self.csv_file, 'rb') as infile:
+            self.stat = os.fstat(infile.fileno())
+            data = infile.read()
+
+        # only complete lines are consumed
+        end = data.rfind(b'\n') + 1
+
+        self.year = build_months(iter_rows(data[:end].decode().splitlines()), self.state, self.exact_target)
+        self.blocks = {(y, m): self.year[y][m].pretty() for y in self.year for m in self.year[y]}
+
+        if self.year:
+            y = sorted(self.year)[-1]
+            self.top = self.year[y][sorted(self.year[y])[-1]]
+        else:
+            self.top = None
+
+        self.offset = end
+        self.guard = data[max(0, end - self.guard_size):end]
+
+        self.write()
+
+        return self
+
+    def poll(self) -> bool:
+        """
+        check the protocol for changes and update output if needed
+
+        :return: True if output has been written
+        """
+
+        stat = os.stat(self.csv_file)
+
+        if self.stat and (stat.st_size, stat.st_mtime_ns) == (self.stat.st_size, self.stat.st_mtime_ns):
+            return False
+
+        with open(self.csv_file, 'rb') as infile:
+            # truncated or rewritten
+            if stat.st_size <= self.offset:
+                self.parse()
+                return True
+
+            # an in-place edit is assumed if the bytes before
+            # the offset differ from those consumed
+            infile.seek(self.offset - len(self.guard))
+            if infile.read(len(self.guard)) != self.guard:
+                self.parse()
+                return True
+
+            data = infile.read()
+
+        self.stat = stat
+
+        end = data.rfind(b'\n') + 1
+
+        # no complete line yet
+        if not end:
+            return False
+
+        if not self._feed(iter_rows(data[:end].decode().splitlines())):
+            self.parse()
+            return True
+
+        self.offset += end
+        self.guard = (self.guard + data[:end])[-self.guard_size:]
+
+        self.write()
+
+        return True
+
+    def _feed(self, rows: Iterable[tuple]) -> bool:
+        """
+        append entries to the Month on top
+
+        :param rows: typed rows as yielded by :func:`fastcsv.iter_rows`
+        :return: False if the entries cannot be appended and a full parse is needed
+        """
+
+        if not self.top:
+            return False
+
+        touched = set()
+
+        for tag, year, month, *entry in rows:
+            if (year, month) < (self.top.year, self.top.month):
+                return False
+
+            if (year, month) > (self.top.year, self.top.month):
+                self.top = self.top.get_next(year=year, month=month)
+                self.year.setdefault(year, {})[month] = self.top
+
+            self.top.append(tag, *entry)
+            touched.add((year, month))
+
+        for year, month in touched:
+            self.blocks[(year, month)] = self.year[year][month].pretty()
+
+        return True
+
+    def write(self) -> 'ProtocolWatcher':
+        """write textfile from the cached blocks, the workbook is left to :meth:`flush`"""
+
+        with open(self.txt_outfile, 'w') as txtfile:
+            # reversed output (Kaufmännische Heftung)
+            for y in reversed(sorted(self.year)):
+                for m in reversed(sorted(self.year[y])):
+                    txtfile.writelines((self.blocks[(y, m)], '\n'))
+
+        if self.changed is None:
+            self.changed = time.monotonic()
+
+        return self
+
+    def flush(self) -> bool:
+        """
+        rewrite the workbook if the Months changed since it was written
+
+        :return: True if the workbook has been written
+        """
+
+        if self.changed is None:
+            return False
+
+        write_workbook(self.year, self.xlsx_outfile)
+        self.changed = None
+
+        return True
+
+    def watch(self, interval: float = 1, settle: float = 5) -> None:
+        """
+        poll the protocol every `interval` seconds until interrupted
+
+        :param settle: seconds after a change the workbook is rewritten
+        """
+
+        self.parse()
+        self.flush()
+
+        try:
+            while True:
+                time.sleep(interval)
+
+                started = time.perf_counter()
+                if self.poll():
+                    print('%s updated in %.0f ms' % (self.csv_file, (time.perf_counter() - started) * 1000))
+
+                if self.changed is not None and time.monotonic() - self.changed >= settle:
+                    self.flush()
+        finally:
+            self.flush()
+
+
 if __name__ == '__main__':
 
     # command line parsing is not very sophisticated since the parser
@@ -83,6 +741,12 @@ if __name__ == '__main__':
     # global options
     parser.add_argument('--csv-file', '-f', metavar='<csv file>', required=False, help='csv file to parse',
                         default='protocol.csv')
+    parser.add_argument('--exact-target', action='store_true',
+                        help='base monthly targets on the working days of each month')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='number of processes parsing the protocol')
+    parser.add_argument('--metrics-file', metavar='<prom file>',
+                        help='OpenMetrics textfile to add metrics of parse and status to')
     parser.add_argument('--version', '-V', action='version', version=f'%(prog)s {VERSION}')
 
     # commands
@@ -90,6 +754,12 @@ if __name__ == '__main__':
 
     parse_protocol = subparser.add_parser('parse', help='parse protocol')
     parse_protocol.add_argument('state', help='state to parse for', nargs='?')
+    parse_protocol.add_argument('--output', '-o', nargs='+', choices=('txt', 'xlsx', 'ndjson', 'summary', 'partial'),
+                                default=('txt', 'xlsx'), help='outputs to write')
+    parse_protocol.add_argument('--split-years', action='store_true',
+                                help='write one workbook per year, closed years only when changed')
+    parse_protocol.add_argument('--pipeline', action='store_true',
+                                help='parse and render in stages running side by side, report their timings')
 
     parse_invoice = subparser.add_parser('invoice', help='create invoice')
     parse_invoice.add_argument('tag', help='tag to create invoice for', nargs='?')
@@ -97,6 +767,26 @@ if __name__ == '__main__':
     parse_invoice = subparser.add_parser('status', help='show last month')
     parse_invoice.add_argument('state', help='state to parse protocol for', nargs='?')
 
+    export_protocol = subparser.add_parser('export', help='export protocol entries with running balances')
+    export_protocol.add_argument('state', help='state to parse for', nargs='?')
+    export_protocol.add_argument('--format', choices=('ndjson',), default='ndjson', help='format to export to')
+
+    import_calendar = subparser.add_parser('import', help='import events from an iCalendar file')
+    import_calendar.add_argument('ics_file', help='iCalendar file to import')
+    import_calendar.add_argument('state', help='state whose working days holidays are entered for', nargs='?')
+
+    merge_summaries = subparser.add_parser('merge', help='merge partial summaries into a team summary')
+    merge_summaries.add_argument('partial_files', nargs='+', help='partial summaries written by parse')
+    merge_summaries.add_argument('--output', '-o', default='team',
+                                 help='name of the merged summary and workbook written')
+
+    watch_protocol = subparser.add_parser('watch', help='update output while protocol grows')
+    watch_protocol.add_argument('state', help='state to parse for', nargs='?')
+    watch_protocol.add_argument('--interval', '-i', type=float, default=1,
+                                help='seconds between polls')
+    watch_protocol.add_argument('--settle', '-s', type=float, default=5,
+                                help='seconds after a change the workbook is rewritten')
+
     parsed = parser.parse_args()
 
     # helpful message if no arguments given
@@ -110,30 +800,156 @@ if __name__ == '__main__':
     csv_infile = str(path)
     xlsx_outfile = str(path.with_suffix('.xlsx'))
     txt_outfile = path.with_suffix('.txt')
+    ndjson_outfile = path.with_suffix('.ndjson')
+    summary_outfile = path.with_name(path.stem + '-summary.csv')
+    partial_outfile = path.with_suffix('.partial')
 
-    # parse the csv
-    with open(csv_infile) as infile:
-        reader = csv.reader(infile)
-        year = parse_csv_protocol(reader, state)
+    metrics = Metrics(parsed.metrics_file)
 
-    if parsed.command == 'parse':
-        # write the parsed protocol to excel and txt
+    if parsed.command == 'merge':
+        team = merge(Summary.read(partial_file) for partial_file in parsed.partial_files)
+        team.write(parsed.output + '.partial')
 
-        with xlsxwriter.Workbook(xlsx_outfile) as workbook, \
-                txt_outfile.open('w') as txtfile:
+        with xlsxwriter.Workbook(parsed.output + '.xlsx') as workbook:
+            team.add_worksheet(workbook)
 
-            # reversed output (Kaufmännische Heftung)
-            for y in reversed(sorted(year)):
-                for m in reversed(sorted(year[y])):
-                    txtfile.writelines((year[y][m].pretty(), '\n'))
-                    year[y][m].get_worksheet(workbook)
-
-            # some feedback
-            print('\nWorkbook written to %s'
-                  '\nTextfile written to %s'
-                  '\nFollowing an output of the month on top.'
-                  '\n' % (xlsx_outfile, str(txt_outfile))
-                  )
+        print('%d protocols merged into %s.partial and %s.xlsx' % (len(team.sources), parsed.output, parsed.output))
+        exit(0)
+
+    if parsed.command == 'watch':
+        print('watching %s, interrupt to stop' % csv_infile)
+
+        try:
+            ProtocolWatcher(csv_infile, state, xlsx_outfile, str(txt_outfile),
+                            parsed.exact_target).watch(parsed.interval, parsed.settle)
+        except KeyboardInterrupt:
+            exit(0)
+
+    if parsed.command == 'export':
+        with ExitStack() as stack:
+            # records are read from the map on each pass, the csv from its start
+            if is_records_file(csv_infile):
+                read_rows = stack.enter_context(RecordReader(csv_infile)).__iter__
+            else:
+                infile = stack.enter_context(open(csv_infile))
+
+                def read_rows():
+                    infile.seek(0)
+                    return iter_rows(infile)
+
+            # streaming needs months in ascending order, rows are
+            # sorted in memory only if they are not
+            if is_sorted_by_month(read_rows()):
+                rows = read_rows()
+            else:
+                print('%s is not sorted by month, sorting in memory' % csv_infile, file=sys.stderr)
+                rows = sorted(read_rows(), key=lambda row: (row[1], row[2]))
+
+            for record in iter_export_records(rows, state, parsed.exact_target):
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        exit(0)
+
+    if parsed.command == 'import':
+        index = RowIndex(csv_infile)
+        rows = []
+
+        with open(parsed.ics_file, encoding='utf-8') as infile:
+            for row in ical.iter_rows(infile, state):
+                key = get_key(*row[1:4], *row[5:])
+
+                # known already or twice in calendar
+                if key in index.keys:
+                    continue
+
+                index.keys.add(key)
+                rows.append(row)
+
+        committed = appender.append(csv_infile, rows) if rows else 0
+        index.update()
+
+        print('%d entries imported from %s, %d rows committed' % (len(rows), parsed.ics_file, committed))
+        exit(0)
+
+    # parse the csv, records files are mapped
+    # status only prints the month on top, entries of the others are not decoded
+    month_class = LazyMonth if parsed.command == 'status' else Month
+
+    # pipelined parsing is done along with rendering
+    pipelined = parsed.command == 'parse' and parsed.pipeline
+
+    if not pipelined:
+        with metrics.timer(parsed.command, 'parse'):
+            if is_records_file(csv_infile):
+                with RecordReader(csv_infile) as reader:
+                    year = build_months(reader, state, parsed.exact_target, month_class)
+
+            elif parsed.jobs > 1 and month_class is Month:
+                year = parse_csv_protocol_parallel(csv_infile, state, parsed.exact_target, parsed.jobs)
+            else:
+                with open(csv_infile) as infile:
+                    year = build_months(iter_rows(infile), state, parsed.exact_target, month_class)
+
+    if parsed.command == 'parse':
+        # write the parsed protocol to all outputs requested
+        # in one pass
+
+        with metrics.timer(parsed.command, 'pipeline' if pipelined else 'render'):
+            with ExitStack() as stack:
+                sinks = []
+                written = []
+                write_xlsx = None
+
+                if 'xlsx' in parsed.output and parsed.split_years:
+                    write_xlsx = lambda years: write_year_workbooks(years, Path(xlsx_outfile))
+
+                elif 'xlsx' in parsed.output and pipelined:
+                    write_xlsx = lambda years: write_workbook(years, xlsx_outfile)
+
+                elif 'xlsx' in parsed.output:
+                    workbook = stack.enter_context(xlsxwriter.Workbook(xlsx_outfile))
+                    sinks.extend((XlsxSink(workbook), BalanceSink(workbook)))
+                    written.append('Workbook written to %s' % xlsx_outfile)
+
+                if write_xlsx and not pipelined:
+                    written.extend('Workbook written to %s' % outfile for outfile in write_xlsx(year))
+
+                if 'txt' in parsed.output:
+                    sinks.append(TextSink(stack.enter_context(txt_outfile.open('w'))))
+                    written.append('Textfile written to %s' % txt_outfile)
+
+                if 'ndjson' in parsed.output:
+                    sinks.append(NdjsonSink(stack.enter_context(ndjson_outfile.open('w'))))
+                    written.append('NDJSON written to %s' % ndjson_outfile)
+
+                if 'summary' in parsed.output:
+                    sinks.append(CsvSummarySink(stack.enter_context(summary_outfile.open('w', newline=''))))
+                    written.append('Summary written to %s' % summary_outfile)
+
+                # reversed output (Kaufmännische Heftung)
+                if pipelined:
+                    year, workbooks, timings = parse_pipelined(csv_infile, state, parsed.exact_target,
+                                                               write_xlsx, sinks)
+                    written[:0] = ('Workbook written to %s' % outfile for outfile in workbooks)
+                else:
+                    render(year, sinks)
+
+            # protocols are told apart by host and path when merged
+            if 'partial' in parsed.output:
+                Summary.from_years(year, '%s:%s' % (socket.gethostname(), path.resolve())).write(partial_outfile)
+                written.append('Partial summary written to %s' % partial_outfile)
+
+        if pipelined:
+            written.append('Stages: %s' % ', '.join('%s %.2f s' % timing for timing in timings.items()))
+
+            for stage, seconds in timings.items():
+                metrics.observe('tick_stage_duration_seconds', seconds, command=parsed.command, stage=stage)
+
+        # some feedback
+        print('\n%s'
+              '\nFollowing an output of the month on top.'
+              '\n' % '\n'.join(written)
+              )
 
     elif parsed.command == 'invoice':
         raise NotImplementedError
@@ -145,4 +961,16 @@ if __name__ == '__main__':
     m = sorted(year[y])[-1]
     print(year[y][m].pretty())
 
+    if parsed.metrics_file:
+        months = [year[y][m] for y in year for m in year[y]]
+        clocks = [month.clock for month in months if month.clock]
+
+        metrics.inc('tick_runs', command=parsed.command)
+        metrics.inc('tick_rows_parsed', sum(month.entries for month in months))
+        metrics.set('tick_months_built', len(months))
+        metrics.set('tick_protocol_bytes', os.path.getsize(csv_infile))
+        metrics.inc('tick_cache_lookups', sum(clock.hits for clock in clocks), cache='clock', result='hit')
+        metrics.inc('tick_cache_lookups', sum(clock.misses for clock in clocks), cache='clock', result='miss')
+        metrics.write()
+
 # vim: ai sts=4 ts=4 sw=4 expandtab
@@ -3,11 +3,16 @@ This module provides the Month and Year classes
 """
 
 from typing import Union
+from collections import namedtuple
+from types import MappingProxyType
 import time
 import datetime
+import calendar
 import xlsxwriter
 from holidays import Holidays
 from version import VERSION
+from workdays import get_calendar
+from clock import LocalClock
 
 
 class InvalidDateException(Exception):
@@ -17,6 +22,18 @@ class ConfusingDataException(Exception):
     pass
 
 
+# sum of durations in seconds and number of entries
+Totals = namedtuple('Totals', ('duration', 'count'))
+
+# fields of an entry in the protocol, in the order taken by Month.append
+ENTRY_FIELDS = ('tag', 'day', 'duration', 'from_unixtime', 'to_unixtime', 'description')
+
+# part of a Month passed between processes, its entries as one list per field
+# of ENTRY_FIELDS instead of one dict per entry
+MonthPart = namedtuple('MonthPart', ('columns', 'working_hours', 'holidays_spent', 'holidays_left_begin',
+                                     'working_hours_account_begin', 'tags', 'days'))
+
+
 class Month:
     """
     Provides the work time protocol for one month
@@ -29,11 +46,18 @@ class Month:
         If only one digit is given it will be padded with a leading 0.
     :param state: state on which based working days are calculated. 
         If given None, all holidays will count which must lead to wrong results.
+    :param exact_target: base the monthly target on the working days of the month
+        instead of the average of the year. Years from 1900 to 2100 are supported.
     :raises InvalidDateException: raised when the Date given is nonsense.
+
+    Entries of a day are aggregated while they are appended. :attr:`tags`
+    maps tags and :attr:`days` maps days to :class:`Totals`, entries of
+    day 0 setting holidays and carryover are not aggregated.
     """
 
     monthly_target = property(
-            lambda self: self.hours_worth_working_day * self.average_working_days_per_month)
+            lambda self: self.hours_worth_working_day * (
+                self.working_days_of_month if self.exact_target else self.average_working_days_per_month))
 
     working_hours_balance = property(
             lambda self: self.working_hours_account - self.monthly_target * 3600)
@@ -44,18 +68,30 @@ class Month:
     holidays_left = property(
             lambda self: self.holidays_left_begin - self.holidays_spent)
 
+    # read-only views of the aggregates maintained by :meth:`append`
+    tags = property(lambda self: MappingProxyType(self._tags))
+
+    days = property(lambda self: MappingProxyType(self._days))
+
+    # number of entries in the protocol
+    entries = property(lambda self: len(self.protocol))
+
 
     def __init__(self, year:int=0, month:int=0, 
                     holidays_left:int=0, working_hours_account:int=0, 
-                    hours_worth_working_day:int=4, state:str=None):
+                    hours_worth_working_day:int=4, state:str=None, exact_target:bool=False):
 
         self.protocol = []
         self.holidays_left_begin = holidays_left
         self.holidays_spent = 0
         self.working_hours_account_begin = working_hours_account
         self.working_hours = 0
+        self._tags = {}
+        self._days = {}
         self.hours_worth_working_day = hours_worth_working_day
         self.state = state
+        self.exact_target = exact_target
+        self.clock = None
 
         t = time.localtime()
 
@@ -72,7 +108,19 @@ class Month:
         if self.month < 1 or self.month > 12:
             raise InvalidDateException('%d is not a valid month' % self.month)
 
-        self.average_working_days_per_month = Holidays(self.year, self.state).get_working_days() / 12
+        self.days_of_month = calendar.monthrange(self.year, self.month)[1]
+
+        if exact_target:
+            try:
+                self.working_days_of_month = get_calendar(self.state).month(self.year, self.month)
+            except ValueError as e:
+                raise InvalidDateException('%s' % str(e))
+
+            self.average_working_days_per_month = None
+
+        else:
+            self.working_days_of_month = None
+            self.average_working_days_per_month = Holidays(self.year, self.state).get_working_days() / 12
 
 
     def get_next(self, year=None, month=None) -> 'Month':
@@ -80,33 +128,31 @@ class Month:
         return the next Month derived from the current
 
         holidays left are transferred, working hours account
-        is adjusted.
+        is adjusted. The next Month is of the same class.
 
         :param month: you can give a different month. If omitted next
             month is assumed.
         
         """
 
-        return Month(year if year else self.year if self.month < 12 else self.year + 1, 
+        return type(self)(year if year else self.year if self.month < 12 else self.year + 1, 
                     month if month else self.month + 1 if self.month < 12 else 1,
                     self.holidays_left, 
                     self.working_hours_balance, 
                     self.hours_worth_working_day,
-                    self.state)
+                    self.state,
+                    self.exact_target)
 
 
-    def append(self, tag:str, day:int, duration:int=0, from_unixtime:int=0, to_unixtime:int=0, description:str=None) -> 'Month':
+    def validate(self, tag:str, day:int, duration:int=0, from_unixtime:int=0, to_unixtime:int=0) -> int:
         """
-        append an entry to the protocol
+        validate an entry to be appended
 
-        :param tag: tag
-        :param duration: duration of work in seconds
-        :param from_unixtime: beginning of work in epoch
-        :param to_unixtime: ending of work in epoch
-        :param description: description
+        :return: duration in seconds, in days for holidays granted
         :raises ConfusingData: when duration and from/to do are both given and do not match
-
+        :raises InvalidDateException: when the day is not one of the month
         """
+
         # validate and set duration
         if from_unixtime and not to_unixtime or to_unixtime and not from_unixtime:
             raise ConfusingDataException('from and to must be given both')
@@ -123,9 +169,33 @@ class Month:
         if not duration:
             duration = to_unixtime - from_unixtime
 
+        # control sequences need no valid day
+        if not day:
+            if tag not in ('h', 'c'):
+                raise Exception('Tag ' + tag + ' is not defined for day == 0')
+
+        # validate date, the month is known to be valid
+        elif not 1 <= day <= self.days_of_month:
+            raise InvalidDateException('day is out of range for month')
+
+        return duration
+
+    def append(self, tag:str, day:int, duration:int=0, from_unixtime:int=0, to_unixtime:int=0, description:str=None) -> 'Month':
+        """
+        append an entry to the protocol
+
+        :param tag: tag
+        :param duration: duration of work in seconds
+        :param from_unixtime: beginning of work in epoch
+        :param to_unixtime: ending of work in epoch
+        :param description: description
+        :raises ConfusingData: when duration and from/to do are both given and do not match
+
+        """
+        duration = self.validate(tag, day, duration, from_unixtime, to_unixtime)
+
         # if day is None or Zero we have a control sequence
         # either adding holidays or carryover
-        # so day has not to be checked for validity
         if not day:
             # adjust day to zero for proper entry
             day = 0
@@ -140,16 +210,6 @@ class Month:
             # add carryover
             elif tag == 'c':
                 self.working_hours_account_begin += duration
-
-            else:
-                raise Exception('Tag ' + tag + ' is not defined for day == 0')
-
-        else:
-            # validate date
-            try:
-                datetime.date(self.year, self.month, day)
-            except ValueError as e:
-                raise InvalidDateException('%s' % str(e))
             
         
         self.protocol.append({
@@ -168,6 +228,13 @@ class Month:
         if tag == 'h' and day:
             self.holidays_spent += 1
 
+        if day:
+            totals = self._tags.get(tag, (0, 0))
+            self._tags[tag] = Totals(totals[0] + duration, totals[1] + 1)
+
+            totals = self._days.get(day, (0, 0))
+            self._days[day] = Totals(totals[0] + duration, totals[1] + 1)
+
         return self
 
     def append_protocol(self, protocol: Union[list, tuple]) -> 'Month':
@@ -178,6 +245,89 @@ class Month:
         for entry in protocol:
             self.append(*entry)
 
+    def merge(self, other: 'Month') -> 'Month':
+        """
+        append the protocol of another part of the same month
+
+        Totals and aggregates are added up instead of appending
+        entry by entry. Begin balances of `other` are added as well.
+
+        :param other: Month holding entries following those of this one
+        """
+
+        self.protocol.extend(other.protocol)
+
+        return self._add(other.working_hours, other.holidays_spent, other.holidays_left_begin,
+                         other.working_hours_account_begin, other._tags, other._days)
+
+    def get_part(self) -> MonthPart:
+        """return entries, totals and aggregates to be merged by :meth:`merge_part`"""
+
+        return MonthPart(
+            tuple([entry[field] for entry in self.protocol] for field in ENTRY_FIELDS),
+            self.working_hours, self.holidays_spent, self.holidays_left_begin, self.working_hours_account_begin,
+            {tag: tuple(totals) for tag, totals in self._tags.items()},
+            {day: tuple(totals) for day, totals in self._days.items()},
+        )
+
+    def merge_part(self, part: MonthPart) -> 'Month':
+        """
+        append the part of another Month of the same month, see :meth:`merge`
+
+        :param part: part as returned by :meth:`get_part`
+        """
+
+        self.protocol.extend({
+            'tag': tag,
+            'day': day,
+            'duration': duration,
+            'from_unixtime': from_unixtime,
+            'to_unixtime': to_unixtime,
+            'description': description,
+        } for tag, day, duration, from_unixtime, to_unixtime, description in zip(*part.columns))
+
+        return self._add(*part[1:])
+
+    def _add(self, working_hours: int, holidays_spent: int, holidays_left_begin: int,
+             working_hours_account_begin: int, tags: dict, days: dict) -> 'Month':
+        # totals and aggregates of another part of the month
+        self.working_hours += working_hours
+        self.holidays_spent += holidays_spent
+        self.holidays_left_begin += holidays_left_begin
+        self.working_hours_account_begin += working_hours_account_begin
+
+        for mine, theirs in ((self._tags, tags), (self._days, days)):
+            for key, (duration, count) in theirs.items():
+                own = mine.get(key, (0, 0))
+                mine[key] = Totals(own[0] + duration, own[1] + count)
+
+        return self
+
+    def get_daily_balance(self) -> list:
+        """
+        return the working hours balance at the end of every day of the month
+
+        The balance is the working hours account less the monthly target
+        pro rata of the days passed. At the end of the month it equals
+        :attr:`working_hours_balance`. It is computed as prefix sum over
+        the working hours per day in one pass.
+
+        :return: list of tuples of :class:`datetime.date` and balance in seconds
+        """
+
+        daily = {day: totals.duration for day, totals in self.days.items()}
+
+        days = self.days_of_month
+        target_per_day = self.monthly_target * 3600 / days
+
+        series = []
+        account = self.working_hours_account_begin
+
+        for day in range(1, days + 1):
+            account += daily.get(day, 0)
+            series.append((datetime.date(self.year, self.month, day), account - target_per_day * day))
+
+        return series
 
     def dump(self) -> dict:
         """return a dict with all values"""
@@ -196,45 +346,41 @@ class Month:
 
 
 
-    def pretty(self) -> str:
-        """return object as pretty string"""
+    def get_clock(self) -> LocalClock:
+        """return the clock converting epoch values of this month, created on first use"""
 
-        # protocol first
+        if not self.clock:
+            self.clock = LocalClock(self.year, self.month)
 
-        protocol = ''
+        return self.clock
 
-        for entry in self.protocol:
-            # pretty fromto
-            if entry['from_unixtime']:
-                from_time = time.localtime(entry['from_unixtime'])  
-                from_hour = from_time.tm_hour
-                from_minute = from_time.tm_min
-            else:
-                from_hour = 0
-                from_minute = 0
-
-            if entry['to_unixtime']:
-                to_time = time.localtime(entry['to_unixtime'])  
-                to_hour = to_time.tm_hour
-                to_minute = to_time.tm_min
-            else:
-                to_time = time.localtime(entry['to_unixtime']) 
-                to_hour = 0
-                to_minute = 0
-
-            # add entry
-            protocol += '%d.%d %.2fh (%02d:%02d-%02d:%02d): %s\n' % (
-                entry['day'],
-                self.month,
-                entry['duration'] / 3600,
-                from_hour, from_minute,
-                to_hour, to_minute,
-                entry['description']
-                )
+    def resolve(self, entry: dict) -> dict:
+        """
+        return a protocol entry with its times converted for rendering
 
-        decorator = 25 * '*'
+        Conversion is done once per entry, renderers share the result.
+        Epoch values are converted by the Month’s :class:`clock.LocalClock`.
+        The entry is extended by
+
+        - `date`: :class:`datetime.date` of the entry, None on day 0
+        - `from_date`, `to_date`: local :class:`datetime.datetime` or None
+          if not given
 
-        # and all together now
+        :param entry: entry as found in :attr:`protocol`
+        """
+
+        clock = self.get_clock()
+
+        return dict(entry,
+            date=datetime.date(self.year, self.month, entry['day']) if entry['day'] else None,
+            from_date=clock.get(entry['from_unixtime']) if entry['from_unixtime'] else None,
+            to_date=clock.get(entry['to_unixtime']) if entry['to_unixtime'] else None
+            )
+
+    def pretty_head(self) -> str:
+        """return the head of :meth:`pretty` up to the protocol"""
+
+        decorator = 25 * '*'
 
         return (
             '%s %04d-%02d %s'
@@ -246,7 +392,7 @@ class Month:
             '\nWorkingHours: %.1fh (%ds)'
             '\nWorkingHoursBalance: %+.1fh (%ds)'
             '\n%s Protocol %s' 
-            '\n%s' % (
+            '\n' % (
                 decorator, self.year, self.month, decorator,
                 self.holidays_left_begin,
                 self.holidays_left,
@@ -256,20 +402,62 @@ class Month:
                 self.working_hours /3600, self.working_hours,
                 self.working_hours_balance / 3600 , self.working_hours_balance,
                 decorator, decorator,
-                protocol
-            ) + 
-            '\n' + 60 * '~'
+            )
         )
 
-    def get_worksheet(self, workbook:xlsxwriter.Workbook, name:str=None) -> xlsxwriter.Workbook:
-        """add protocol as worksheet to xlsx workbook"""
+    def pretty_entry(self, entry: dict) -> str:
+        """
+        return a line of :meth:`pretty`
+
+        :param entry: entry as returned by :meth:`resolve`
+        """
+
+        # pretty fromto
+        from_date = entry['from_date']
+        to_date = entry['to_date']
+
+        return '%d.%d %.2fh (%02d:%02d-%02d:%02d): %s\n' % (
+            entry['day'],
+            self.month,
+            entry['duration'] / 3600,
+            from_date.hour if from_date else 0, from_date.minute if from_date else 0,
+            to_date.hour if to_date else 0, to_date.minute if to_date else 0,
+            entry['description']
+            )
+
+    def pretty_foot(self) -> str:
+        """return the foot of :meth:`pretty` following the protocol"""
+
+        return '\n' + 60 * '~'
+
+    def pretty(self) -> str:
+        """return object as pretty string"""
 
-        # formatting
-        bold = workbook.add_format({'bold':True})
-        date_format = workbook.add_format({'num_format':'dd\.m\.yy'})
-        time_format = workbook.add_format({'num_format':'hh:mm'})
-        duration_format = workbook.add_format({'num_format':'?.0?\h'})
-        holiday_format = workbook.add_format({'num_format':'0\d'})
+        return (
+            self.pretty_head() +
+            ''.join(self.pretty_entry(self.resolve(entry)) for entry in self.protocol) +
+            self.pretty_foot()
+        )
+
+    @staticmethod
+    def get_worksheet_formats(workbook: xlsxwriter.Workbook) -> dict:
+        """return the formats used in worksheets, to be shared among them"""
+
+        return {
+            'bold': workbook.add_format({'bold':True}),
+            'date': workbook.add_format({'num_format':'dd\.m\.yy'}),
+            'time': workbook.add_format({'num_format':'hh:mm'}),
+            'duration': workbook.add_format({'num_format':'?.0?\h'}),
+            'holiday': workbook.add_format({'num_format':'0\d'}),
+        }
+
+    def add_worksheet_head(self, workbook: xlsxwriter.Workbook, formats: dict, name: str=None):
+        """
+        add a worksheet with header, footer and headrow to the workbook
+
+        :param formats: as returned by :meth:`get_worksheet_formats`
+        :return: the worksheet added
+        """
 
         # worksheet’s name
         if not name:
@@ -289,47 +477,47 @@ class Month:
         sheet.set_footer('&LErzeugt am %s &C&P/&N &R Time Tracker V%s' % (now_string,
                                                                 VERSION))
 
-        sheet.write_row(0, 0, ('Datum', 'Von', 'Bis', 'Dauer', 'Tätigkeit'), bold)
-        
+        sheet.write_row(0, 0, ('Datum', 'Von', 'Bis', 'Dauer', 'Tätigkeit'), formats['bold'])
 
-        # row index 
-        row_idx = 1
+        return sheet
 
-        for row in self.protocol:
-            # some calc
-            if row['from_unixtime']:
-                from_date = datetime.datetime.fromtimestamp(row['from_unixtime'])
-            else:
-                from_date = None
+    def add_worksheet_row(self, sheet, row_idx: int, entry: dict, formats: dict) -> int:
+        """
+        add an entry to a worksheet
 
-            if row['to_unixtime']:
-                to_date = datetime.datetime.fromtimestamp(row['to_unixtime'])
-            else:
-                to_date = None
+        :param row_idx: row to write to
+        :param entry: entry as returned by :meth:`resolve`
+        :param formats: as returned by :meth:`get_worksheet_formats`
+        :return: the next row index
+        """
 
-            if not row['day']:
-                day = None
-            else:
-                day = datetime.date(self.year, self.month, row['day'])
+        # add row
+        if entry['date']:
+            sheet.write_datetime(row_idx, 0, entry['date'], formats['date'])
 
-            duration = row['duration'] / 3600
+        if entry['from_date']:
+            sheet.write_datetime(row_idx, 1, entry['from_date'], formats['time'])
 
-            # add row
-            if day:
-                sheet.write_datetime(row_idx, 0, day, date_format)
+        if entry['to_date']:
+            sheet.write_datetime(row_idx, 2, entry['to_date'], formats['time'])
 
-            if from_date:
-                sheet.write_datetime(row_idx, 1, from_date, time_format)
+        sheet.write_number(row_idx, 3, entry['duration'] / 3600, formats['duration'])
 
-            if to_date:
-                sheet.write_datetime(row_idx, 2, to_date, time_format)
+        sheet.write_string(row_idx, 4, entry['description'])
 
-            sheet.write_number(row_idx, 3, duration, duration_format)
+        return row_idx + 1
 
-            sheet.write_string(row_idx, 4, row['description'])
+    def add_worksheet_foot(self, sheet, row_idx: int, formats: dict) -> int:
+        """
+        add the foot rows to a worksheet
 
-            row_idx += 1
+        :param row_idx: row following the last entry
+        :param formats: as returned by :meth:`get_worksheet_formats`
+        :return: the next row index
+        """
 
+        bold = formats['bold']
+        duration_format = formats['duration']
 
         # add foot rows
         row_idx += 1
@@ -354,8 +542,33 @@ class Month:
         sheet.write_comment(row_idx, 0,
             'Verbleibende Urlaubstage')
         sheet.write_number(row_idx, 3,
-            self.holidays_left, holiday_format)
+            self.holidays_left, formats['holiday'])
+
+        # illness is counted in days, one entry each
+        if 'i' in self._tags:
+            row_idx += 1
+            sheet.write(row_idx, 0,
+                'Krankheit:', bold)
+            sheet.write_comment(row_idx, 0,
+                'Krankheitstage diesen Monat')
+            sheet.write_number(row_idx, 3,
+                self._tags['i'].count, formats['holiday'])
+
+        return row_idx + 1
+
+    def get_worksheet(self, workbook:xlsxwriter.Workbook, name:str=None) -> xlsxwriter.Workbook:
+        """add protocol as worksheet to xlsx workbook"""
+
+        formats = self.get_worksheet_formats(workbook)
+        sheet = self.add_worksheet_head(workbook, formats, name)
+
+        # row index 
+        row_idx = 1
+
+        for entry in self.protocol:
+            row_idx = self.add_worksheet_row(sheet, row_idx, self.resolve(entry), formats)
 
+        self.add_worksheet_foot(sheet, row_idx, formats)
 
         return workbook
 
@@ -386,13 +599,172 @@ class Month:
         )
 
 
+class LazyMonth(Month):
+    """
+    Provides a Month decoding its entries on first access
+
+    While rows are appended only the balances needed to chain Months
+    are kept up to date, the rows themselves are kept as given, lists
+    passed to :meth:`append_protocol` by reference. They are appended as
+    entries and aggregated on first access to :attr:`protocol`,
+    :attr:`tags` or :attr:`days`, e.g. by :meth:`pretty`, :meth:`get_worksheet`
+    or :meth:`dump`. Rows are validated when appended as by :meth:`Month.append`.
+
+    Takes the same parameters as :class:`Month`.
+    """
+
+    tags = property(lambda self: MappingProxyType(self.materialize()._tags))
+
+    days = property(lambda self: MappingProxyType(self.materialize()._days))
+
+    # rows kept are counted, not decoded
+    entries = property(lambda self: len(self._protocol) + self._pending)
+
+    def __init__(self, *args, **kwargs):
+        self._chunks = []
+        self._pending = 0
+        super().__init__(*args, **kwargs)
+
+    @property
+    def protocol(self) -> list:
+        return self.materialize()._protocol
+
+    @protocol.setter
+    def protocol(self, protocol: list):
+        self._protocol = protocol
+
+    def append(self, tag:str, day:int, duration:int=0, from_unixtime:int=0, to_unixtime:int=0, description:str=None) -> 'LazyMonth':
+        """keep a row to be appended as entry on first access, see :meth:`Month.append`"""
+
+        self._account(tag, day, duration, from_unixtime, to_unixtime)
+        self._chunks.append(((tag, day, duration, from_unixtime, to_unixtime, description),))
+
+        return self
+
+    def append_protocol(self, protocol: Union[list, tuple]) -> 'LazyMonth':
+        """keep a list or tuple of rows to be appended as entries on first access"""
+
+        for i, entry in enumerate(protocol):
+            try:
+                self._account(*entry[:5])
+            except Exception:
+                # the rows before are kept as by Month.append_protocol
+                self._chunks.append(protocol[:i])
+                raise
+
+        self._chunks.append(protocol)
+
+        return self
+
+    def _account(self, tag:str, day:int, duration:int, from_unixtime:int, to_unixtime:int) -> None:
+        # balances as adjusted by Month.append
+        duration = self.validate(tag, day, duration, from_unixtime, to_unixtime)
+        self._pending += 1
+
+        if not day:
+            if tag == 'h':
+                self.holidays_left_begin += duration
+            elif tag == 'c':
+                self.working_hours_account_begin += duration
+
+        else:
+            self.working_hours += duration
+
+            if tag == 'h':
+                self.holidays_spent += 1
+
+    def materialize(self) -> 'LazyMonth':
+        """append the rows kept as entries"""
+
+        if not self._chunks:
+            return self
+
+        # Month.append reads the protocol, the chunks are set aside meanwhile
+        chunks, self._chunks = self._chunks, []
+
+        # balances are up to date already
+        balances = (self.holidays_left_begin, self.working_hours_account_begin,
+                    self.working_hours, self.holidays_spent)
+        size, tags, days = len(self._protocol), dict(self._tags), dict(self._days)
+
+        try:
+            for chunk in chunks:
+                for entry in chunk:
+                    Month.append(self, *entry)
+
+        except Exception:
+            # undone, the rows are kept and raise again on next access
+            del self._protocol[size:]
+            self._tags, self._days = tags, days
+            self._chunks = chunks
+            raise
+
+        finally:
+            (self.holidays_left_begin, self.working_hours_account_begin,
+             self.working_hours, self.holidays_spent) = balances
+
+        self._pending = 0
+
+        return self
+
+
+class MonthSnapshot:
+    """
+    closing balances and aggregates of a Month without its protocol
+
+    Used by :class:`Season` in place of Months falling out of its window.
+
+    :param month: Month to take the snapshot of
+    """
+
+    __slots__ = ('year', 'month', 'holidays_left_begin', 'holidays_left', 'holidays_spent',
+                 'working_hours_account_begin', 'working_hours_account', 'monthly_target',
+                 'working_hours', 'working_hours_balance', 'entries')
+
+    def __init__(self, month: Month):
+        self.year = month.year
+        self.month = month.month
+        self.holidays_left_begin = month.holidays_left_begin
+        self.holidays_left = month.holidays_left
+        self.holidays_spent = month.holidays_spent
+        self.working_hours_account_begin = month.working_hours_account_begin
+        self.working_hours_account = month.working_hours_account
+        self.monthly_target = month.monthly_target
+        self.working_hours = month.working_hours
+        self.working_hours_balance = month.working_hours_balance
+        self.entries = month.entries
+
+    def dump(self) -> dict:
+        """return a dict with all values, `protocol` is None"""
+
+        return {
+            'year': self.year,
+            'month': self.month,
+            'holidays_left_begin': self.holidays_left_begin,
+            'holidays_left': self.holidays_left,
+            'working_hours_account_begin': self.working_hours_account_begin,
+            'working_hours_account': self.working_hours_account,
+            'monthly_target': self.monthly_target,
+            'working_hours': self.working_hours,
+            'protocol': None
+        }
+
+
 class Season:
     """
     contains a valid chain of Months
+
+    With a window given only the latest Months are held in :attr:`months`.
+    Older ones are collapsed into instances of :class:`MonthSnapshot`
+    kept in :attr:`snapshots`.
+
+    :param window: number of Months held in full, all if omitted
     """
 
-    def __init__(self, t = 0, working_hours_account = 0):
+    def __init__(self, t = 0, working_hours_account = 0, window:int=None):
         self.months = []
+        self.snapshots = []
+        self.window = window
 
     def add_month(self, month:Month) -> 'Season':
         """
@@ -404,8 +776,8 @@ class Season:
 
         # if it is not the first one added
         # validate against last in chain
-        if self.months:
-            former = self.months[-1]
+        if self.months or self.snapshots:
+            former = self.months[-1] if self.months else self.snapshots[-1]
 
             if former.working_hours_balance != month.working_hours_account_begin:
                 raise ValueError('working_hours_balance from %d is %d and does not'
@@ -421,7 +793,32 @@ class Season:
 
         self.months.append(month)
 
+        # collapse what fell out of the window
+        if self.window is not None:
+            while len(self.months) > self.window:
+                self.snapshots.append(MonthSnapshot(self.months.pop(0)))
+
         return self
 
+    def dump(self) -> list:
+        """return a list of dicts with all values of snapshots and Months in chain"""
+
+        return [month.dump() for month in self.snapshots + self.months]
+
+    def get_daily_balance(self) -> list:
+        """
+        return the working hours balance at the end of every day
+        continued over all Months held in full
+
+        :return: list of tuples of :class:`datetime.date` and balance in seconds
+        """
+
+        series = []
+
+        for month in self.months:
+            series.extend(month.get_daily_balance())
+
+        return series
+
 
 # vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,197 @@
+#!venv/bin/python
+"""
+This module provides an index of recent descriptions and from-to patterns
+
+The index is built from the last rows of the protocol, read backwards
+from its end, and kept in :file:`protocol.csv.recent` for the shell
+completion to read. Rows appended later are added incrementally,
+the index is built anew once as many rows have been added as it was
+built from, so it keeps reflecting recent entries.
+
+Each line of the index is either the offset of the protocol indexed up to
+and the number of rows added since it was built::
+
+    @<offset> <rows added>
+
+or an entry, `d` for descriptions and `t` for from-to patterns::
+
+    <d|t>\\t<count>\\t<text>
+"""
+
+import argparse
+import csv
+import os
+import time
+
+from collections import Counter
+from typing import Iterator
+
+# rows read from the end of the protocol
+DEPTH = 500
+
+# entries kept of each kind
+SIZE = 200
+
+
+def get_recent_file(protocol_file: str) -> str:
+    """return the path of the index belonging to `protocol_file`"""
+
+    return protocol_file + '.recent'
+
+
+def iter_lines_reversed(path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """yield the lines of a file starting with the last one"""
+
+    with open(path, 'rb') as infile:
+        position = infile.seek(0, os.SEEK_END)
+        rest = b''
+
+        while position:
+            size = min(block_size, position)
+            position -= size
+            infile.seek(position)
+
+            lines = (infile.read(size) + rest).split(b'\n')
+
+            # the first line may be incomplete
+            rest = lines.pop(0)
+
+            for line in reversed(lines):
+                if line:
+                    yield line.decode()
+
+        if rest:
+            yield rest.decode()
+
+
+def get_fromto(row: list) -> str:
+    """return from-to of a row as HH:MM-HH:MM, None if not given"""
+
+    if not row[5] or not row[6]:
+        return None
+
+    from_time = time.localtime(int(row[5]))
+    to_time = time.localtime(int(row[6]))
+
+    return '%02d:%02d-%02d:%02d' % (from_time.tm_hour, from_time.tm_min, to_time.tm_hour, to_time.tm_min)
+
+
+class RecentIndex:
+    """
+    Provides counts of recent descriptions and from-to patterns
+
+    :param protocol_file: protocol to index
+    """
+
+    def __init__(self, protocol_file: str):
+        self.protocol_file = protocol_file
+        self.recent_file = get_recent_file(protocol_file)
+        self.descriptions = Counter()
+        self.fromtos = Counter()
+        self.offset = 0
+        self.added = 0
+
+        try:
+            with open(self.recent_file) as infile:
+                for line in infile:
+                    if line.startswith('@'):
+                        offset, added = line[1:].split()
+                        self.offset, self.added = int(offset), int(added)
+                        continue
+
+                    kind, count, text = line.rstrip('\n').split('\t', 2)
+                    (self.descriptions if kind == 'd' else self.fromtos)[text] = int(count)
+        except FileNotFoundError:
+            self.offset = None
+
+    def add(self, row: list) -> None:
+        """count a row as read from the `csv`"""
+
+        # holidays, illness and carryover are entered by their own commands
+        if row[0] != 'e':
+            return
+
+        description = ' '.join(row[7].split())
+        if description:
+            self.descriptions[description] += 1
+
+        fromto = get_fromto(row)
+        if fromto:
+            self.fromtos[fromto] += 1
+
+    def build(self, depth: int = DEPTH) -> 'RecentIndex':
+        """build the index from the last `depth` rows of the protocol"""
+
+        self.descriptions = Counter()
+        self.fromtos = Counter()
+        self.offset = os.path.getsize(self.protocol_file)
+        self.added = 0
+
+        lines = iter_lines_reversed(self.protocol_file)
+
+        for row in csv.reader(line for line, _ in zip(lines, range(depth))):
+            if len(row) == 8:
+                self.add(row)
+
+        return self.write()
+
+    def update(self, depth: int = DEPTH) -> 'RecentIndex':
+        """add the rows appended to the protocol since the last update"""
+
+        size = os.path.getsize(self.protocol_file)
+
+        if self.offset is None or size < self.offset or self.added >= depth:
+            return self.build(depth)
+
+        if size == self.offset:
+            return self
+
+        with open(self.protocol_file, 'rb') as infile:
+            infile.seek(self.offset)
+            data = infile.read()
+
+        # only complete lines are indexed
+        end = data.rfind(b'\n') + 1
+
+        for row in csv.reader(data[:end].decode().splitlines()):
+            if len(row) == 8:
+                self.add(row)
+                self.added += 1
+
+        self.offset += end
+
+        return self.write()
+
+    def write(self) -> 'RecentIndex':
+        """write the index, replacing the former one at once"""
+
+        tmp_file = self.recent_file + '.tmp'
+
+        with open(tmp_file, 'w') as outfile:
+            outfile.write('@%d %d\n' % (self.offset, self.added))
+
+            for kind, counter in (('d', self.descriptions), ('t', self.fromtos)):
+                outfile.writelines('%s\t%d\t%s\n' % (kind, count, text)
+                                   for text, count in counter.most_common(SIZE))
+
+        os.replace(tmp_file, self.recent_file)
+
+        return self
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='index recent descriptions of a Tick protocol')
+    parser.add_argument('protocol_file', help='protocol to index')
+    parser.add_argument('--rebuild', action='store_true', help='build the index anew')
+
+    parsed = parser.parse_args()
+
+    index = RecentIndex(parsed.protocol_file)
+
+    if parsed.rebuild:
+        index.build()
+    else:
+        index.update()
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
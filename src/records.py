@@ -0,0 +1,246 @@
+#!venv/bin/python
+"""
+This module provides a binary record format of the protocol
+
+The file consists of a header, fixed-width records and a heap of
+descriptions, all little-endian::
+
+    header   magic `TICKREC1`, number of records (uint32), size of the heap (uint32)
+    records  tag (char), flags (uint8), year (uint16), month (uint8), day (uint8),
+             2 bytes padding, duration, from and to unixtime (int64 each),
+             offset and length of the description in the heap (uint32 each)
+    heap     descriptions encoded as UTF-8
+
+Set bits of the flags mark day, duration, from and to as empty.
+Records are read from a memory map without copying, as :class:`memoryview`
+or, if NumPy is installed, as structured array.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+from typing import Iterable, Iterator
+
+from appender import format_row
+from fastcsv import iter_rows
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'TICKREC1'
+
+HEADER = struct.Struct('<8sII')
+
+RECORD = struct.Struct('<cBHBB2xqqqII')
+
+# flags marking empty fields, in order of the fields
+EMPTY_DAY, EMPTY_DURATION, EMPTY_FROM, EMPTY_TO = (1 << bit for bit in range(4))
+
+# the record layout as NumPy dtype
+DTYPE = dict(
+    names=('tag', 'flags', 'year', 'month', 'day', 'duration', 'from_unixtime', 'to_unixtime',
+           'description_offset', 'description_length'),
+    formats=('S1', '<u1', '<u2', '<u1', '<u1', '<i8', '<i8', '<i8', '<u4', '<u4'),
+    offsets=(0, 1, 2, 4, 5, 8, 16, 24, 32, 36),
+    itemsize=RECORD.size,
+)
+
+
+def is_records_file(path: str) -> bool:
+    """return whether `path` starts like a records file"""
+
+    with open(path, 'rb') as infile:
+        return infile.read(len(MAGIC)) == MAGIC
+
+
+def write_records(rows: Iterable[tuple], records_file: str) -> int:
+    """
+    write typed rows to a records file, replacing it at once
+
+    :param rows: tag, year, month, day, duration, from unixtime, to unixtime
+        and description, None for empty fields
+    :return: number of records written
+    """
+
+    tmp_file = records_file + '.tmp'
+    heap = bytearray()
+    count = 0
+
+    with open(tmp_file, 'wb') as outfile:
+        outfile.write(HEADER.pack(MAGIC, 0, 0))
+
+        for tag, year, month, day, duration, from_unixtime, to_unixtime, description in rows:
+            flags = 0
+
+            for flag, field in zip((EMPTY_DAY, EMPTY_DURATION, EMPTY_FROM, EMPTY_TO),
+                                   (day, duration, from_unixtime, to_unixtime)):
+                if field is None:
+                    flags |= flag
+
+            encoded = (description or '').encode()
+
+            outfile.write(RECORD.pack(tag.encode(), flags, year, month, day or 0,
+                                      duration or 0, from_unixtime or 0, to_unixtime or 0,
+                                      len(heap), len(encoded)))
+            heap += encoded
+            count += 1
+
+        outfile.write(heap)
+
+        outfile.seek(0)
+        outfile.write(HEADER.pack(MAGIC, count, len(heap)))
+
+    os.replace(tmp_file, records_file)
+
+    return count
+
+
+class RecordReader:
+    """
+    Provides the records of a records file from a memory map
+
+    Views handed out refer to the map and must not be used after
+    the reader has been closed.
+
+    :param records_file: file to read
+    :raises ValueError: when `records_file` is not a records file
+    """
+
+    def __init__(self, records_file: str):
+        with open(records_file, 'rb') as infile:
+            self.map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, heap_size = HEADER.unpack_from(self.map) if len(self.map) >= HEADER.size else (None, 0, 0)
+
+        if magic != MAGIC or len(self.map) != HEADER.size + self.count * RECORD.size + heap_size:
+            self.map.close()
+            raise ValueError('%s is not a records file' % records_file)
+
+        view = memoryview(self.map)
+        heap_start = HEADER.size + self.count * RECORD.size
+
+        #: the records as :class:`memoryview`
+        self.records = view[HEADER.size:heap_start]
+
+        #: the descriptions as :class:`memoryview`
+        self.heap = view[heap_start:]
+
+        view.release()
+
+    def __enter__(self) -> 'RecordReader':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> tuple:
+        if not -self.count <= index < self.count:
+            raise IndexError('record index out of range')
+
+        return self._get_row(RECORD.unpack_from(self.records, (index % self.count) * RECORD.size))
+
+    def __iter__(self) -> Iterator[tuple]:
+        """yield the records as rows, None for empty fields"""
+
+        for record in RECORD.iter_unpack(self.records):
+            yield self._get_row(record)
+
+    def _get_row(self, record: tuple) -> tuple:
+        tag, flags, year, month, day, duration, from_unixtime, to_unixtime, offset, length = record
+
+        return (
+            tag.decode(), year, month,
+            None if flags & EMPTY_DAY else day,
+            None if flags & EMPTY_DURATION else duration,
+            None if flags & EMPTY_FROM else from_unixtime,
+            None if flags & EMPTY_TO else to_unixtime,
+            str(self.heap[offset:offset + length], 'utf-8'),
+        )
+
+    def array(self):
+        """
+        return the records as NumPy structured array sharing the map
+
+        Fields are named as in :data:`DTYPE`, empty fields are 0
+        and marked in `flags`.
+
+        :raises RuntimeError: when NumPy is not installed
+        """
+
+        if numpy is None:
+            raise RuntimeError('NumPy is required for arrays of records')
+
+        return numpy.frombuffer(self.records, dtype=numpy.dtype(DTYPE), count=self.count)
+
+    def close(self) -> None:
+        """release the views and close the map"""
+
+        self.records.release()
+        self.heap.release()
+        self.map.close()
+
+
+def iter_typed_rows(rows: Iterable[list]) -> Iterator[tuple]:
+    """yield rows as read from the `csv` with their types adjusted, None for empty fields"""
+
+    for row in rows:
+        if row:
+            yield (row[0], *(int(field) if field else None for field in row[1:7]),
+                   row[7] if len(row) > 7 else '')
+
+
+def import_csv(csv_file: str, records_file: str) -> int:
+    """
+    write the rows of a `csv` protocol to a records file
+
+    :return: number of records written
+    """
+
+    with open(csv_file) as infile:
+        return write_records(iter_rows(infile), records_file)
+
+
+def export_csv(records_file: str, outfile) -> int:
+    """
+    write the records as `csv` protocol in the format written by the controller
+
+    :param outfile: file object to write to
+    :return: number of rows written
+    """
+
+    with RecordReader(records_file) as reader:
+        outfile.writelines(format_row(row) for row in reader)
+
+        return len(reader)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='convert a Tick protocol between csv and records')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='write a records file from a csv protocol')
+    import_parser.add_argument('csv_file', help='protocol to read')
+    import_parser.add_argument('records_file', help='records file to write')
+
+    export_parser = subparsers.add_parser('export', help='print a records file as csv protocol')
+    export_parser.add_argument('records_file', help='records file to read')
+
+    parsed = parser.parse_args()
+
+    if parsed.command == 'import':
+        count = import_csv(parsed.csv_file, parsed.records_file)
+        print('%d records written to %s' % (count, parsed.records_file))
+
+    elif parsed.command == 'export':
+        export_csv(parsed.records_file, sys.stdout)
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,224 @@
+"""
+This module provides the render pipeline and its sinks
+
+A single pass over the entries of every Month feeds any number of sinks.
+Each entry is resolved once by :meth:`protocol.Month.resolve` and handed
+to all sinks so adding an output does not add a pass over the protocol.
+"""
+
+import csv
+import json
+
+import xlsxwriter
+
+
+class Sink:
+    """
+    base class for sinks fed by :func:`render`
+
+    The files or workbooks written to are opened and closed by the caller.
+    """
+
+    def begin_month(self, month) -> None:
+        """called before the first entry of `month`"""
+
+    def entry(self, month, entry: dict) -> None:
+        """
+        called for every entry of `month`
+
+        :param entry: entry as returned by :meth:`protocol.Month.resolve`
+        """
+
+    def end_month(self, month) -> None:
+        """called after the last entry of `month`"""
+
+    def close(self) -> None:
+        """called after the last month"""
+
+
+class TextSink(Sink):
+    """
+    write Months to a textfile as done by :meth:`protocol.Month.pretty`
+
+    :param outfile: file object to write to
+    """
+
+    def __init__(self, outfile):
+        self.outfile = outfile
+
+    def begin_month(self, month):
+        self.outfile.write(month.pretty_head())
+
+    def entry(self, month, entry):
+        self.outfile.write(month.pretty_entry(entry))
+
+    def end_month(self, month):
+        self.outfile.writelines((month.pretty_foot(), '\n'))
+
+
+class XlsxSink(Sink):
+    """
+    add a worksheet for each Month to a workbook as done by :meth:`protocol.Month.get_worksheet`
+
+    :param workbook: workbook to add the worksheets to
+    """
+
+    def __init__(self, workbook: xlsxwriter.Workbook):
+        self.workbook = workbook
+        self.formats = None
+        self.sheet = None
+        self.row_idx = 0
+
+    def begin_month(self, month):
+        # formats are shared by all sheets
+        if not self.formats:
+            self.formats = month.get_worksheet_formats(self.workbook)
+
+        self.sheet = month.add_worksheet_head(self.workbook, self.formats)
+        self.row_idx = 1
+
+    def entry(self, month, entry):
+        self.row_idx = month.add_worksheet_row(self.sheet, self.row_idx, entry, self.formats)
+
+    def end_month(self, month):
+        month.add_worksheet_foot(self.sheet, self.row_idx, self.formats)
+
+
+class BalanceSink(Sink):
+    """
+    add a sheet charting the working hours balance at the end of every day
+
+    The balance of each Month is taken from :meth:`protocol.Month.get_daily_balance`
+    based on the Month’s per-day aggregates. The sheet is added when the sink is closed.
+
+    :param workbook: workbook to add the sheet to
+    :param name: name of the sheet
+    """
+
+    def __init__(self, workbook: xlsxwriter.Workbook, name: str = 'Kontoverlauf'):
+        self.workbook = workbook
+        self.name = name
+        self.series = {}
+
+    def end_month(self, month):
+        self.series[(month.year, month.month)] = month.get_daily_balance()
+
+    def close(self):
+        if not self.series:
+            return
+
+        bold = self.workbook.add_format({'bold': True})
+        date_format = self.workbook.add_format({'num_format': 'dd\\.m\\.yy'})
+        duration_format = self.workbook.add_format({'num_format': '0.0\\h'})
+
+        sheet = self.workbook.add_worksheet(self.name)
+        sheet.set_column('A:B', 12)
+        sheet.write_row(0, 0, ('Datum', 'Konto'), bold)
+
+        row_idx = 1
+
+        # chronological regardless of the order rendered
+        for key in sorted(self.series):
+            for date, balance in self.series[key]:
+                sheet.write_datetime(row_idx, 0, date, date_format)
+                sheet.write_number(row_idx, 1, balance / 3600, duration_format)
+                row_idx += 1
+
+        chart = self.workbook.add_chart({'type': 'line'})
+        chart.add_series({
+            'name': 'Konto',
+            'categories': [self.name, 1, 0, row_idx - 1, 0],
+            'values': [self.name, 1, 1, row_idx - 1, 1],
+        })
+        chart.set_title({'name': 'Arbeitsstundenkonto'})
+        chart.set_x_axis({'date_axis': True, 'num_format': 'm.yy'})
+        chart.set_y_axis({'num_format': '0\\h'})
+        chart.set_legend({'none': True})
+        chart.set_size({'width': 960, 'height': 480})
+
+        sheet.insert_chart('D2', chart)
+
+
+class NdjsonSink(Sink):
+    """
+    write one JSON record per entry, newline delimited
+
+    :param outfile: file object to write to
+    """
+
+    def __init__(self, outfile):
+        self.outfile = outfile
+
+    def entry(self, month, entry):
+        self.outfile.write(json.dumps({
+            'year': month.year,
+            'month': month.month,
+            'day': entry['day'],
+            'date': entry['date'].isoformat() if entry['date'] else None,
+            'tag': entry['tag'],
+            'duration': entry['duration'],
+            'from': entry['from_date'].isoformat() if entry['from_date'] else None,
+            'to': entry['to_date'].isoformat() if entry['to_date'] else None,
+            'description': entry['description'],
+        }, ensure_ascii=False))
+        self.outfile.write('\n')
+
+
+class CsvSummarySink(Sink):
+    """
+    write one `csv` row of totals per Month
+
+    :param outfile: file object to write to
+    """
+
+    header = ('year', 'month', 'entries', 'working_hours', 'monthly_target',
+              'working_hours_account_begin', 'working_hours_balance',
+              'holidays_left_begin', 'holidays_left')
+
+    def __init__(self, outfile):
+        self.writer = csv.writer(outfile)
+        self.writer.writerow(self.header)
+
+    def end_month(self, month):
+        self.writer.writerow((
+            month.year,
+            month.month,
+            len(month.protocol),
+            month.working_hours,
+            month.monthly_target,
+            month.working_hours_account_begin,
+            month.working_hours_balance,
+            month.holidays_left_begin,
+            month.holidays_left,
+        ))
+
+
+def render(years: dict, sinks: tuple, reverse: bool = True) -> None:
+    """
+    feed the Months in `years` to the sinks in one pass
+
+    :param years: dict of years containing Months as returned by :func:`parser.parse_csv_protocol`
+    :param sinks: instances of :class:`Sink`
+    :param reverse: start with the latest month (Kaufmännische Heftung)
+    """
+
+    for y in sorted(years, reverse=reverse):
+        for m in sorted(years[y], reverse=reverse):
+            month = years[y][m]
+
+            for sink in sinks:
+                sink.begin_month(month)
+
+            for entry in month.protocol:
+                entry = month.resolve(entry)
+
+                for sink in sinks:
+                    sink.entry(month, entry)
+
+            for sink in sinks:
+                sink.end_month(month)
+
+    for sink in sinks:
+        sink.close()
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
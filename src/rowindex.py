@@ -0,0 +1,119 @@
+"""
+This module provides a persistent hash index over protocol rows
+
+Each row is keyed by a hash of its date, from, to and description.
+The index lives next to the protocol in an append-only file holding
+one key per line and, after each update, the offset of the protocol
+up to which rows have been indexed along with a checksum of the bytes
+up to there. Rows appended since are indexed when the index is opened.
+A protocol shorter than that offset or differing in its checksum has
+been rewritten or edited in place and is indexed anew.
+"""
+
+import csv
+import hashlib
+import os
+
+from typing import Union
+
+
+def get_index_file(protocol_file: str) -> str:
+    """return the path of the index belonging to `protocol_file`"""
+
+    return protocol_file + '.idx'
+
+
+def get_key(year: int, month: int, day: int, from_unixtime: int, to_unixtime: int, description: str) -> str:
+    """return the key of a row, empty fields given as None or 0"""
+
+    return hashlib.sha1(('%d-%d-%d|%d|%d|%s' % (
+        year, month, day or 0, from_unixtime or 0, to_unixtime or 0, description or '')
+        ).encode()).hexdigest()[:16]
+
+
+def get_row_key(row: Union[list, tuple]) -> str:
+    """
+    return the key of a row as read from the `csv`
+
+    :param row: tag, year, month, day, duration, from unixtime, to unixtime and description
+    """
+
+    return get_key(*(int(field) if field else None for field in row[1:4]),
+                   *(int(field) if field else None for field in row[5:7]), row[7] if len(row) > 7 else '')
+
+
+class RowIndex:
+    """
+    Provides membership tests of protocol rows in O(1)
+
+    :param protocol_file: protocol to index
+    """
+
+    def __init__(self, protocol_file: str):
+        self.protocol_file = protocol_file
+        self.index_file = get_index_file(protocol_file)
+        self.keys = set()
+        self.offset = 0
+        self.checksum = None
+
+        try:
+            with open(self.index_file) as infile:
+                for line in infile:
+                    if line.startswith('@'):
+                        # indexes written without checksum are built anew
+                        offset, self.checksum = (line[1:].split() + [None])[:2]
+                        self.offset = int(offset)
+                    else:
+                        self.keys.add(line.rstrip('\n'))
+        except FileNotFoundError:
+            pass
+
+        self.update()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def update(self) -> 'RowIndex':
+        """index the rows appended to the protocol since the last update"""
+
+        try:
+            with open(self.protocol_file, 'rb') as infile:
+                data = infile.read()
+        except FileNotFoundError:
+            data = b''
+
+        checksum = hashlib.sha1(data[:self.offset])
+
+        # rewritten or edited, start over
+        if self.offset and (len(data) < self.offset or checksum.hexdigest() != self.checksum):
+            self.keys = set()
+            self.offset = 0
+            self.checksum = None
+            checksum = hashlib.sha1()
+            open(self.index_file, 'w').close()
+
+        data = data[self.offset:]
+
+        # only complete lines are indexed
+        end = data.rfind(b'\n') + 1
+
+        if not end:
+            return self
+
+        keys = [get_row_key(row) for row in csv.reader(data[:end].decode().splitlines()) if row]
+        checksum.update(data[:end])
+
+        self.keys.update(keys)
+        self.offset += end
+        self.checksum = checksum.hexdigest()
+
+        with open(self.index_file, 'a') as outfile:
+            outfile.writelines(key + '\n' for key in keys)
+            outfile.write('@%d %s\n' % (self.offset, self.checksum))
+
+        return self
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,167 @@
+"""
+This module provides partial summaries of protocols to be merged
+
+A summary holds totals per month, closing balances and totals per tag
+of one or more protocols, but none of their entries. Summaries of
+protocols parsed on different hosts are merged into one of a team
+without the protocols being shipped or parsed again. Merging adds up
+integers only, so it is associative and commutative.
+
+Summaries are written as compact JSON::
+
+    {"version": 1, "sources": [...], "months": {"<YYYY-MM>": {...}}}
+"""
+
+import functools
+import json
+
+from typing import Iterable
+
+import xlsxwriter
+
+VERSION = 1
+
+# totals of a month, all of them integers
+FIELDS = ('protocols', 'entries', 'working_hours', 'monthly_target', 'working_hours_balance',
+          'holidays_spent', 'holidays_left')
+
+
+class Summary:
+    """
+    Provides the totals per month of a set of protocols
+
+    :param sources: names of the protocols summarized
+    :param months: totals per month keyed by `YYYY-MM` as in :data:`FIELDS`,
+        `tags` mapping tags to lists of duration and count
+    """
+
+    def __init__(self, sources: Iterable[str] = (), months: dict = None):
+        self.sources = frozenset(sources)
+        self.months = months or {}
+
+    @classmethod
+    def from_years(cls, years: dict, source: str) -> 'Summary':
+        """
+        summarize a parsed protocol
+
+        :param years: dict of years as returned by :func:`parser.parse_csv_protocol`
+        :param source: name of the protocol, unique among those merged
+        """
+
+        months = {}
+
+        for y in years:
+            for m, month in years[y].items():
+                months['%04d-%02d' % (y, m)] = {
+                    'protocols': 1,
+                    'entries': len(month.protocol),
+                    'working_hours': month.working_hours,
+                    'monthly_target': round(month.monthly_target * 3600),
+                    'working_hours_balance': round(month.working_hours_balance),
+                    'holidays_spent': month.holidays_spent,
+                    'holidays_left': month.holidays_left,
+                    'tags': {tag: list(totals) for tag, totals in month.tags.items()},
+                }
+
+        return cls((source,), months)
+
+    def merge(self, other: 'Summary') -> 'Summary':
+        """
+        return the summary of the protocols of both
+
+        :raises ValueError: when a protocol is summarized in both
+        """
+
+        if self.sources & other.sources:
+            raise ValueError('summarized twice: %s' % ', '.join(sorted(self.sources & other.sources)))
+
+        months = {key: dict(totals, tags=dict(totals['tags'])) for key, totals in self.months.items()}
+
+        for key, theirs in other.months.items():
+            if key not in months:
+                months[key] = dict(theirs, tags=dict(theirs['tags']))
+                continue
+
+            mine = months[key]
+
+            for field in FIELDS:
+                mine[field] += theirs[field]
+
+            for tag, (duration, count) in theirs['tags'].items():
+                own = mine['tags'].get(tag, (0, 0))
+                mine['tags'][tag] = [own[0] + duration, own[1] + count]
+
+        return Summary(self.sources | other.sources, months)
+
+    def dump(self) -> dict:
+        """return a dict with all values"""
+
+        return {
+            'version': VERSION,
+            'sources': sorted(self.sources),
+            'months': {key: self.months[key] for key in sorted(self.months)},
+        }
+
+    def write(self, path: str) -> 'Summary':
+        """write the summary to `path`"""
+
+        with open(path, 'w') as outfile:
+            json.dump(self.dump(), outfile, ensure_ascii=False, separators=(',', ':'))
+
+        return self
+
+    @classmethod
+    def read(cls, path: str) -> 'Summary':
+        """
+        read a summary written by :meth:`write`
+
+        :raises ValueError: when the file is no summary of this version
+        """
+
+        with open(path) as infile:
+            data = json.load(infile)
+
+        if not isinstance(data, dict) or data.get('version') != VERSION:
+            raise ValueError('%s is no summary of version %d' % (path, VERSION))
+
+        return cls(data['sources'], data['months'])
+
+    def add_worksheet(self, workbook: xlsxwriter.Workbook, name: str = 'Team'):
+        """
+        add a sheet with one row per month in chronological order
+
+        :return: the worksheet added
+        """
+
+        bold = workbook.add_format({'bold': True})
+        duration_format = workbook.add_format({'num_format': '0.0\\h'})
+        days_format = workbook.add_format({'num_format': '0\\d'})
+
+        sheet = workbook.add_worksheet(name)
+        sheet.set_column('A:I', 12)
+        sheet.write_row(0, 0, ('Monat', 'Protokolle', 'Einträge', 'Gesamt', 'Soll', 'Konto',
+                               'Urlaub', 'Resturlaub', 'Krankheit'), bold)
+
+        for row_idx, key in enumerate(sorted(self.months), 1):
+            totals = self.months[key]
+
+            sheet.write_string(row_idx, 0, key)
+            sheet.write_number(row_idx, 1, totals['protocols'])
+            sheet.write_number(row_idx, 2, totals['entries'])
+
+            for col, field in enumerate(('working_hours', 'monthly_target', 'working_hours_balance'), 3):
+                sheet.write_number(row_idx, col, totals[field] / 3600, duration_format)
+
+            sheet.write_number(row_idx, 6, totals['holidays_spent'], days_format)
+            sheet.write_number(row_idx, 7, totals['holidays_left'], days_format)
+            sheet.write_number(row_idx, 8, totals['tags'].get('i', (0, 0))[1], days_format)
+
+        return sheet
+
+
+def merge(summaries: Iterable[Summary]) -> Summary:
+    """return the merge of any number of summaries"""
+
+    return functools.reduce(Summary.merge, summaries, Summary())
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
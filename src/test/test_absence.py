@@ -0,0 +1,70 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from absence import AbsenceIndex, get_mask
+
+
+class TestAbsence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index_file = os.path.join(self.tmpdir.name, 'absence.json')
+        self.protocols = {}
+
+        for name, rows in (
+                ('anna', ['h,2019,12,0,30,,,"Urlaubstage"', 'h,2019,12,23,,,,"Urlaub"', 'h,2019,12,27,,,,"Urlaub"',
+                          'h,2020,01,02,,,,"Urlaub"']),
+                ('bert', ['e,2019,12,23,3600,,,"test"', 'i,2019,12,27,,,,"Krankheit"'])):
+            self.protocols[name] = os.path.join(self.tmpdir.name, name + '.csv')
+
+            with open(self.protocols[name], 'w') as outfile:
+                outfile.writelines(row + '\n' for row in rows)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_get_mask(self):
+        self.assertEqual(get_mask(datetime.date(2019, 1, 1), datetime.date(2019, 1, 3)), 0b111)
+        self.assertEqual(get_mask(datetime.date(2019, 1, 2), datetime.date(2019, 1, 2)), 0b10)
+
+    def test_queries(self):
+        index = AbsenceIndex(self.index_file)
+        self.assertEqual(index.update('anna', self.protocols['anna']), 3)
+        self.assertEqual(index.update('bert', self.protocols['bert']), 1)
+
+        self.assertEqual(index.get_absent(datetime.date(2019, 12, 23), datetime.date(2019, 12, 24)), ['anna'])
+        self.assertEqual(index.get_absent(datetime.date(2019, 12, 27), datetime.date(2020, 1, 5)), ['anna', 'bert'])
+        self.assertEqual(index.get_common_absences(('anna', 'bert'), datetime.date(2019, 12, 1), datetime.date(2020, 1, 31)),
+                         [datetime.date(2019, 12, 27)])
+        self.assertEqual([count for _, count in index.get_available(datetime.date(2019, 12, 26), datetime.date(2019, 12, 27))],
+                         [2, 0])
+
+    def test_update(self):
+        AbsenceIndex(self.index_file).update('bert', self.protocols['bert'])
+        index = AbsenceIndex(self.index_file)
+        self.assertEqual(index.people, {})
+
+        index.update('bert', self.protocols['bert'])
+        index.write()
+
+        with open(self.protocols['bert'], 'a') as outfile:
+            outfile.write('h,2019,12,30,,,,"Urlaub"\n')
+
+        # only the row appended is read
+        index = AbsenceIndex(self.index_file)
+        self.assertEqual(index.update('bert'), 1)
+        self.assertTrue(index.is_absent('bert', datetime.date(2019, 12, 30)))
+        self.assertEqual(index.counts[2019][363], 1)
+
+        # rewritten
+        with open(self.protocols['bert'], 'w') as outfile:
+            outfile.write('h,2019,12,2,,,,"Urlaub"\n')
+
+        self.assertEqual(index.update('bert'), 1)
+        self.assertFalse(index.is_absent('bert', datetime.date(2019, 12, 30)))
+        self.assertEqual(index.counts[2019][363], 0)
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,75 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from appender import append, spool, commit, format_row
+
+
+class TestAppender(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.protocol_file = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+
+    def tearDown(self):
+        for path in (self.protocol_file, self.protocol_file + '.spool'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_format_row(self):
+        self.assertEqual(format_row(('e', 2019, 11, 4, 3600, None, None, 'a "quote"')),
+                         'e,2019,11,04,3600,,,"a ""quote"""\n')
+        self.assertEqual(format_row(('h', 2019, 1, 0, 2, None, None, 'Urlaubstage')),
+                         'h,2019,01,0,2,,,"Urlaubstage"\n')
+
+    def test_group_commit(self):
+        # nothing pending
+        self.assertEqual(commit(self.protocol_file), 0)
+
+        # rows spooled by others are carried by the next commit
+        spool(self.protocol_file, [format_row(('e', 2019, 11, 4, 60, None, None, 'other'))])
+        self.assertEqual(append(self.protocol_file, [('e', 2019, 11, 5, 60, None, None, 'own')]), 2)
+
+        with open(self.protocol_file) as infile:
+            rows = list(csv.reader(infile))
+
+        self.assertEqual([row[7] for row in rows], ['other', 'own'])
+        self.assertEqual(os.path.getsize(self.protocol_file + '.spool'), 0)
+
+    def test_crashed_commit(self):
+        first = format_row(('e', 2019, 11, 4, 60, None, None, 'first'))
+        second = format_row(('e', 2019, 11, 5, 60, None, None, 'second'))
+        later = format_row(('e', 2019, 11, 6, 60, None, None, 'later'))
+
+        # crashed after writing to the protocol, in full and in part
+        for written in (first + second, first + second[:10]):
+            with open(self.protocol_file, 'w') as outfile:
+                outfile.write(written)
+
+            with open(self.protocol_file + '.spool', 'w') as spoolfile:
+                spoolfile.write('#commit 0 %d\n' % len(first + second))
+                spoolfile.writelines((first, second, later))
+
+            commit(self.protocol_file)
+
+            with open(self.protocol_file) as infile:
+                self.assertEqual(infile.read(), first + second + later)
+
+            self.assertEqual(os.path.getsize(self.protocol_file + '.spool'), 0)
+
+        # crashed before
+        with open(self.protocol_file, 'w') as outfile:
+            outfile.write(first)
+
+        with open(self.protocol_file + '.spool', 'w') as spoolfile:
+            spoolfile.write('#commit %d %d\n' % (len(first), len(second)))
+            spoolfile.write(second)
+
+        self.assertEqual(commit(self.protocol_file), 1)
+
+        with open(self.protocol_file) as infile:
+            self.assertEqual(infile.read(), first + second)
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
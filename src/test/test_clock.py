@@ -0,0 +1,39 @@
+import datetime
+import os
+import time
+import unittest
+
+from clock import LocalClock
+
+
+class TestLocalClock(unittest.TestCase):
+
+    def setUp(self):
+        self.tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'Europe/Berlin'
+        time.tzset()
+
+    def tearDown(self):
+        if self.tz is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = self.tz
+        time.tzset()
+
+    def test_get(self):
+        # DST ends on 27th
+        clock = LocalClock(2019, 10)
+
+        self.assertIsNone(clock.offsets[26])
+        self.assertEqual(clock.offsets[0], 7200)
+        self.assertEqual(clock.offsets[30], 3600)
+
+        for epoch in range(clock.starts[0] - 86400, clock.starts[-1] + 86400, 1800):
+            self.assertEqual(clock.get(epoch), datetime.datetime.fromtimestamp(epoch))
+
+        # converted once
+        clock.get(clock.starts[3])
+        self.assertEqual(clock.hits, 1)
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
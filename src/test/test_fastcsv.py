@@ -0,0 +1,37 @@
+import csv
+import unittest
+
+from fastcsv import iter_rows
+from records import iter_typed_rows
+
+
+class TestFastcsv(unittest.TestCase):
+
+    def test_iter_rows(self):
+        lines = [
+            'h,2019,01,0,30,,,"Urlaubstage"\n',
+            'e,2019,01,02,3600,1546419600,1546423200,"task"\n',
+            'e,2019,01,02,,1546419600,1546423200,""\n',
+            'e,2019,01,03,900,,,"say ""hello"", then\n',
+            'go on"\n',
+            '\n',
+            'i,2019,01,04,,,,Krankheit\n',
+        ]
+
+        rows = list(iter_rows(lines))
+
+        self.assertEqual(rows, list(iter_typed_rows(csv.reader(lines))))
+        self.assertEqual(rows[1], ('e', 2019, 1, 2, 3600, 1546419600, 1546423200, 'task'))
+        self.assertEqual(rows[3][7], 'say "hello", then\ngo on')
+        self.assertEqual(len(rows), 5)
+
+    def test_row_without_description(self):
+        lines = ['e,2019,11,04,3600,,\n', 'e,2019,11,04,1800,,,"task"\n']
+
+        rows = list(iter_rows(lines))
+
+        self.assertEqual(rows, list(iter_typed_rows(csv.reader(lines))))
+        self.assertEqual(rows[0], ('e', 2019, 11, 4, 3600, None, None, ''))
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from ical import iter_rows
+from rowindex import RowIndex, get_key
+
+CALENDAR = '''BEGIN:VCALENDAR
+BEGIN:VEVENT
+DTSTART:20191104T080000Z
+DTEND:20191104T100000Z
+SUMMARY:Review\\, project
+  X
+END:VEVENT
+BEGIN:VEVENT
+DTSTART;VALUE=DATE:20191118
+DTEND;VALUE=DATE:20191123
+SUMMARY:Urlaub
+END:VEVENT
+END:VCALENDAR
+'''.splitlines(keepends=True)
+
+
+class TestIcal(unittest.TestCase):
+
+    def test_iter_rows(self):
+        rows = list(iter_rows(CALENDAR, 'sn'))
+
+        self.assertEqual(rows[0], ('e', 2019, 11, 4, 7200, 1572854400, 1572861600, 'Review, project X'))
+
+        # Buß und Bettag is skipped
+        self.assertEqual([row[3] for row in rows[1:]], [18, 19, 21, 22])
+        self.assertEqual({row[0] for row in rows[1:]}, {'h'})
+
+    def test_all_day_event(self):
+        # from Friday to Monday
+        calendar = ['BEGIN:VEVENT\n', 'DTSTART;VALUE=DATE:20191122\n', 'DTEND;VALUE=DATE:20191126\n',
+                    'SUMMARY:Conference\n', 'END:VEVENT\n']
+
+        rows = list(iter_rows(calendar, 'sn'))
+
+        # weekend days are not entered as working days
+        self.assertEqual([row[3] for row in rows], [22, 25])
+        self.assertEqual(rows[0], ('e', 2019, 11, 22, None, None, None, 'Conference'))
+
+    def test_multiline_summary(self):
+        calendar = ['BEGIN:VEVENT\n', 'DTSTART:20191104T080000Z\n', 'DTEND:20191104T100000Z\n',
+                    'SUMMARY:Review\\nproject\n', 'END:VEVENT\n']
+
+        self.assertEqual(list(iter_rows(calendar))[0][-1], 'Review project')
+
+
+class TestRowIndex(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.protocol_file = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as outfile:
+            outfile.write('e,2019,11,04,3600,,,"test"\n')
+
+    def tearDown(self):
+        for path in (self.protocol_file, self.protocol_file + '.idx'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_update(self):
+        self.assertIn(get_key(2019, 11, 4, None, None, 'test'), RowIndex(self.protocol_file))
+
+        with open(self.protocol_file, 'a') as outfile:
+            outfile.write('e,2019,11,05,3600,,,"appended"\n')
+
+        # opened again only appended rows are read
+        index = RowIndex(self.protocol_file)
+        self.assertEqual(len(index), 2)
+        self.assertIn(get_key(2019, 11, 5, 0, 0, 'appended'), index)
+
+        # rewritten protocol is indexed anew
+        with open(self.protocol_file, 'w') as outfile:
+            outfile.write('e,2019,11,06,3600,,,"new"\n')
+
+        self.assertEqual(len(RowIndex(self.protocol_file)), 1)
+
+        # as is one edited in place, of the same size or grown
+        for description in ('NEW', 'newer'):
+            with open(self.protocol_file, 'r+') as outfile:
+                outfile.write('e,2019,11,06,3600,,,"%s"\n' % description)
+
+            index = RowIndex(self.protocol_file)
+            self.assertEqual(len(index), 1)
+            self.assertIn(get_key(2019, 11, 6, 0, 0, description), index)
+
+    def test_row_without_description(self):
+        with open(self.protocol_file, 'a') as outfile:
+            outfile.write('e,2019,11,05,3600,,\n')
+
+        self.assertIn(get_key(2019, 11, 5, None, None, ''), RowIndex(self.protocol_file))
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'tick.prom')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_write(self):
+        for size in (100, 200):
+            metrics = Metrics(self.path)
+            metrics.inc('tick_runs', command='parse')
+            metrics.set('tick_protocol_bytes', size)
+            metrics.observe('tick_stage_duration_seconds', 0.02, command='parse', stage='parse')
+            metrics.write()
+
+        with open(self.path) as infile:
+            lines = infile.read().splitlines()
+
+        # counters and histograms accumulate, gauges are replaced
+        self.assertIn('tick_runs_total{command="parse"} 2', lines)
+        self.assertIn('tick_protocol_bytes 200', lines)
+        self.assertIn('tick_stage_duration_seconds_bucket{command="parse",stage="parse",le="0.01"} 0', lines)
+        self.assertIn('tick_stage_duration_seconds_bucket{command="parse",stage="parse",le="0.025"} 2', lines)
+        self.assertIn('tick_stage_duration_seconds_bucket{command="parse",stage="parse",le="1.0"} 2', lines)
+        self.assertIn('tick_stage_duration_seconds_bucket{command="parse",stage="parse",le="+Inf"} 2', lines)
+        self.assertIn('tick_stage_duration_seconds_count{command="parse",stage="parse"} 2', lines)
+        self.assertEqual(lines[-1], '# EOF')
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_read_bounds(self):
+        # bounds written before they were canonical are merged
+        with open(self.path, 'w') as outfile:
+            outfile.write('tick_stage_duration_seconds_bucket{command="parse",stage="parse",le="1"} 1\n# EOF\n')
+
+        metrics = Metrics(self.path)
+        metrics.observe('tick_stage_duration_seconds', 0.02, command='parse', stage='parse')
+        metrics.write()
+
+        with open(self.path) as infile:
+            lines = infile.read().splitlines()
+
+        self.assertIn('tick_stage_duration_seconds_bucket{command="parse",stage="parse",le="1.0"} 2', lines)
+        self.assertFalse([line for line in lines if 'le="1"' in line])
+
+    def test_no_path(self):
+        metrics = Metrics()
+        with metrics.timer('status', 'parse'):
+            pass
+        metrics.write()
+
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,250 @@
+import csv
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from pathlib import Path
+
+from fastcsv import iter_rows
+from parser import ProtocolWatcher, UnsortedProtocolException, is_sorted_by_month, iter_export_records, \
+    parse_csv_protocol, parse_csv_protocol_parallel, parse_pipelined, write_year_workbooks
+from protocol import InvalidDateException
+from render import TextSink, render
+
+
+class TestParser(unittest.TestCase):
+
+    def setUp(self):
+        rows = ['h,2018,12,0,30,,,"Urlaubstage"']
+
+        for month in range(1, 13):
+            rows.append('c,2019,%02d,0,1800,,,"Übertrag"' % month)
+            rows.extend('e,2019,%02d,%02d,%d,,,"test"' % (month, day, day * 900) for day in range(1, 29))
+            rows.append('h,2019,%02d,10,,,,"Urlaub"' % month)
+            rows.append('c,2019,%02d,0,900,,,"Übertrag"' % month)
+
+        # a month out of order
+        rows.append('e,2018,12,24,3600,,,"late"')
+
+        fd, self.csv_file = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as outfile:
+            outfile.write('\n'.join(rows) + '\n')
+
+    def tearDown(self):
+        os.remove(self.csv_file)
+
+    def test_parse_csv_protocol_parallel(self):
+        with open(self.csv_file) as infile:
+            expected = parse_csv_protocol(csv.reader(infile), 'sn')
+
+        # small chunks to have months spread over several
+        parsed = parse_csv_protocol_parallel(self.csv_file, 'sn', jobs=2, chunk_size=256)
+
+        self.assertEqual(sorted(parsed), sorted(expected))
+
+        for year in expected:
+            self.assertEqual(sorted(parsed[year]), sorted(expected[year]))
+
+            for month in expected[year]:
+                self.assertEqual(parsed[year][month].dump(), expected[year][month].dump())
+
+    def test_iter_export_records(self):
+        with open(self.csv_file) as infile:
+            expected = parse_csv_protocol(csv.reader(infile), 'sn')
+            infile.seek(0)
+            rows = list(iter_rows(infile))
+
+        # the month out of order at the end
+        self.assertFalse(is_sorted_by_month(rows))
+        self.assertTrue(is_sorted_by_month(rows[:-1]))
+
+        with self.assertRaises(UnsortedProtocolException):
+            list(iter_export_records(rows, 'sn'))
+
+        # sorted as done by the export
+        records = list(iter_export_records(sorted(rows, key=lambda row: (row[1], row[2])), 'sn'))
+        self.assertEqual(len(records), len(rows))
+        self.assertEqual([(record['year'], record['month']) for record in records[:3]],
+                         [(2018, 12), (2018, 12), (2019, 1)])
+
+        # the balance runs with every entry
+        first, second = records[3:5]
+        self.assertEqual((first['date'], first['duration']), ('2019-01-01', 900))
+        self.assertEqual(second['working_hours_account'] - first['working_hours_account'], 1800)
+
+        # the last record of a month has its closing balances
+        for record, following in zip(records, records[1:] + [None]):
+            if not following or following['month'] != record['month']:
+                month = expected[record['year']][record['month']]
+                self.assertEqual(record['working_hours_account'], month.working_hours_account)
+                self.assertEqual(record['holidays_left'], month.holidays_left)
+
+    def test_parse_pipelined(self):
+        with open(self.csv_file) as infile:
+            lines = infile.readlines()
+
+        # without and with the month out of order, the latter is built again sequentially
+        for protocol in (lines[:-1], lines):
+            with open(self.csv_file, 'w') as outfile:
+                outfile.writelines(protocol)
+
+            expected = parse_csv_protocol(csv.reader(protocol), 'sn')
+            expected_text = io.StringIO()
+            render(expected, (TextSink(expected_text),))
+
+            # small batches to have months spread over several
+            text = io.StringIO()
+            written = []
+            years, workbooks, timings = parse_pipelined(self.csv_file, 'sn', write_workbook=lambda years: written,
+                                                        sinks=(TextSink(text),), batch_size=7)
+
+            self.assertIs(workbooks, written)
+            self.assertEqual(set(timings), {'decode', 'build', 'xlsx', 'render', 'total'})
+            self.assertEqual(years[2019][12].dump(), expected[2019][12].dump())
+            self.assertEqual(text.getvalue(), expected_text.getvalue())
+
+    def test_parse_pipelined_invalid(self):
+        # more batches than the queue holds follow the invalid row
+        with open(self.csv_file, 'w') as outfile:
+            outfile.write('e,2019,11,31,3600,,,"invalid"\n')
+            outfile.writelines('e,2019,12,%02d,3600,,,"test"\n' % (day % 28 + 1) for day in range(100))
+
+        with self.assertRaises(InvalidDateException):
+            parse_pipelined(self.csv_file, 'sn', queue_size=1, batch_size=1)
+
+        # decoding has been stopped
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name == 'decode'])
+
+    def test_write_year_workbooks(self):
+        with open(self.csv_file) as infile:
+            years = parse_csv_protocol(csv.reader(infile), 'sn')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xlsx_outfile = Path(tmpdir, 'protocol.xlsx')
+
+            written = write_year_workbooks(years, xlsx_outfile, current_year=2019)
+            self.assertEqual([Path(f).name for f in written],
+                             ['protocol-2018.xlsx', 'protocol-2019.xlsx', 'protocol.xlsx'])
+
+            # closed years are skipped unless changed
+            written = write_year_workbooks(years, xlsx_outfile, current_year=2019)
+            self.assertEqual([Path(f).name for f in written], ['protocol-2019.xlsx', 'protocol.xlsx'])
+
+            years[2018][12].append('e', day=31, duration=3600, description='changed')
+            written = write_year_workbooks(years, xlsx_outfile, current_year=2019)
+            self.assertIn(str(xlsx_outfile.with_name('protocol-2018.xlsx')), written)
+
+
+
+class CountingWatcher(ProtocolWatcher):
+    """ProtocolWatcher counting full parses"""
+
+    parses = 0
+
+    def parse(self):
+        self.parses += 1
+        return super().parse()
+
+
+class TestProtocolWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.tmpdir.name, 'protocol.csv')
+
+        with open(self.csv_file, 'w') as outfile:
+            for month in range(1, 4):
+                outfile.write('c,2019,%02d,0,1800,,,"Übertrag"\n' % month)
+                outfile.writelines('e,2019,%02d,%02d,3600,,,"test"\n' % (month, day) for day in range(1, 6))
+
+        self.watcher = CountingWatcher(self.csv_file, 'sn', self.csv_file[:-4] + '.xlsx', self.csv_file[:-4] + '.txt')
+        self.watcher.parse()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def append(self, data: str):
+        with open(self.csv_file, 'a') as outfile:
+            outfile.write(data)
+
+        # mtimes may not differ between writes in quick succession
+        stat = os.stat(self.csv_file)
+        os.utime(self.csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    def assertParsed(self):
+        with open(self.csv_file) as infile:
+            expected = parse_csv_protocol(csv.reader(infile), 'sn')
+
+        text = io.StringIO()
+        render(expected, (TextSink(text),))
+
+        with open(self.watcher.txt_outfile) as infile:
+            self.assertEqual(infile.read(), text.getvalue())
+
+    def test_append_top_month(self):
+        self.append('e,2019,03,06,7200,,,"appended"\n')
+
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.watcher.parses, 1)
+        self.assertParsed()
+
+    def test_append_new_month(self):
+        self.append('e,2019,05,02,7200,,,"next"\n')
+
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.watcher.parses, 1)
+        self.assertIn(5, self.watcher.year[2019])
+        self.assertParsed()
+
+    def test_partial_line(self):
+        self.append('e,2019,03,06,72')
+
+        self.assertFalse(self.watcher.poll())
+        self.assertEqual(len(self.watcher.top.protocol), 6)
+
+        self.append('00,,,"completed"\n')
+
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.watcher.parses, 1)
+        self.assertParsed()
+
+    def test_edit_in_place(self):
+        with open(self.csv_file, 'r+') as outfile:
+            data = outfile.read()
+            outfile.seek(0)
+            outfile.write(data.replace('"test"', '"TEST"', 1))
+
+        stat = os.stat(self.csv_file)
+        os.utime(self.csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.watcher.parses, 2)
+        self.assertParsed()
+
+    def test_append_earlier_month(self):
+        self.append('e,2019,01,10,7200,,,"late"\n')
+
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.watcher.parses, 2)
+        self.assertParsed()
+
+    def test_flush(self):
+        xlsx_outfile = self.watcher.xlsx_outfile
+
+        self.assertTrue(self.watcher.flush())
+        self.assertTrue(os.path.exists(xlsx_outfile))
+        os.remove(xlsx_outfile)
+
+        # polling leaves the workbook to flush
+        self.append('e,2019,03,06,7200,,,"appended"\n')
+        self.assertTrue(self.watcher.poll())
+        self.assertFalse(os.path.exists(xlsx_outfile))
+
+        self.assertTrue(self.watcher.flush())
+        self.assertTrue(os.path.exists(xlsx_outfile))
+        self.assertFalse(self.watcher.flush())
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -2,7 +2,7 @@ import unittest
 from unittest import TestCase
 
 from protocol import Month as Protocol
-from protocol import Month, Season
+from protocol import Month, LazyMonth, Season
 from protocol import InvalidDateException
 from protocol import ConfusingDataException
 import time
@@ -151,8 +151,136 @@ class TestMonth(unittest.TestCase):
         self.assertEqual(m.monthly_target, 251 / 12)
         self.assertEqual(m.working_hours_balance, -75300)
 
+    def test_exact_target(self):
+        # 20 working days in Saxony in November 2019 due to Buß und Bettag
+        m = Month(year=2019, month=11, hours_worth_working_day=4, state='sn', exact_target=True)
+        self.assertEqual(m.monthly_target, 20 * 4)
+        self.assertTrue(m.get_next().exact_target)
+
+        self.assertRaises(InvalidDateException, Month, year=1899, month=1, exact_target=True)
+
+    def test_get_daily_balance(self):
+        m = Month(year=2019, month=11, working_hours_account=3600, state='sn')
+        m.append('e', 4, 7200, None, None, 'test')
+        m.append('e', 4, 3600, None, None, 'test')
+        m.append('e', 30, 3600, None, None, 'test')
+
+        series = m.get_daily_balance()
+        target_per_day = m.monthly_target * 3600 / 30
+
+        self.assertEqual(len(series), 30)
+        self.assertEqual(series[0][1], 3600 - target_per_day)
+        self.assertEqual(series[3][1], 3600 + 10800 - 4 * target_per_day)
+        self.assertAlmostEqual(series[-1][1], m.working_hours_balance)
+
+    def test_aggregates(self):
+        m = Month(year=2019, month=11, state='sn')
+        m.append('h', 0, 5, None, None, 'Urlaubstage')
+        m.append('e', 4, 7200, None, None, 'test')
+        m.append('e', 4, 3600, None, None, 'test')
+        m.append('i', 5, None, None, None, 'Krankheit')
+
+        self.assertEqual(m.tags, {'e': (10800, 2), 'i': (14400, 1)})
+        self.assertEqual(m.days[4].duration, 10800)
+        self.assertEqual(m.days[5].count, 1)
+
+        # read-only
+        with self.assertRaises(TypeError):
+            m.tags['e'] = (0, 0)
+
+        # merged parts aggregate as if appended to one
+        other = Month(year=2019, month=11, state='sn')
+        other.append('e', 5, 1800, None, None, 'test')
+        m.merge(other)
+
+        self.assertEqual(len(m.protocol), 5)
+        self.assertEqual(m.tags['e'], (12600, 3))
+        self.assertEqual(m.days[5], (16200, 2))
+        self.assertEqual(m.working_hours, sum(totals.duration for totals in m.days.values()))
+
+        # so do parts passed between processes
+        part = Month(year=2019, month=11, state='sn').merge_part(m.get_part())
+
+        self.assertEqual(part.dump(), m.dump())
+        self.assertEqual(part.tags, m.tags)
+        self.assertEqual(part.days, m.days)
+
+    def test_lazy_month(self):
+        rows = [('h', 0, 30, None, None, 'Urlaubstage'), ('c', 0, -1800, None, None, 'Übertrag'),
+                ('e', 4, 7200, None, None, 'test'), ('e', 5, None, 1573023600, 1573027200, 'test'),
+                ('h', 6, None, None, None, 'Urlaub')]
+
+        eager = Month(year=2019, month=11, state='sn')
+        eager.append_protocol(rows)
+        lazy = LazyMonth(year=2019, month=11, state='sn')
+        lazy.append_protocol(rows)
+
+        # balances are there, entries are not
+        self.assertEqual(lazy.working_hours_balance, eager.working_hours_balance)
+        self.assertEqual(lazy.holidays_left, eager.holidays_left)
+        self.assertEqual(lazy.entries, 5)
+        self.assertTrue(lazy._chunks)
+
+        # the next Month is lazy as well
+        self.assertIsInstance(lazy.get_next(), LazyMonth)
+        self.assertEqual(lazy.get_next().dump(), eager.get_next().dump())
+
+        self.assertEqual(lazy.dump(), eager.dump())
+        self.assertEqual(lazy.tags, eager.tags)
+        self.assertFalse(lazy._chunks)
+
+        # invalid rows raise when appended as they do for a Month
+        self.assertRaises(InvalidDateException, lazy.append, 'e', 31, 3600, None, None, 'test')
+        self.assertRaises(ConfusingDataException, lazy.append, 'e', 7, 60, 1573113600, 1573117200, 'test')
+        self.assertRaises(Exception, lazy.append_protocol, [('e', 7, 3600, None, None, 'test'),
+                                                            ('x', 0, 3600, None, None, 'test')])
+        self.assertEqual(lazy.entries, 6)
+
+        # rows are kept by reference, those changed since raise once decoded
+        rows = [('e', 8, 3600, None, None, 'test'), ('e', 9, 3600, None, None, 'test')]
+        lazy.append_protocol(rows)
+        rows[1] = ('e', 31, 3600, None, None, 'test')
+        working_hours = lazy.working_hours
+        self.assertRaises(InvalidDateException, lazy.pretty)
+
+        # and leave the Month as it was
+        self.assertEqual(lazy.working_hours, working_hours)
+        self.assertEqual(lazy.entries, 8)
+        self.assertRaises(InvalidDateException, lazy.pretty)
+
 
 # vim: ai sts=4 ts=4 sw=4 expandtab
 class TestSeason(TestCase):
     def test_add_month(self):
-        self.fail()
+        m = Month(year=2019, month=1, holidays_left=30, state='sn')
+        m.append('e', 2, 3600, None, None, 'test')
+
+        season = Season().add_month(m)
+
+        # balances must match
+        self.assertRaises(ValueError, season.add_month, Month(year=2019, month=2, state='sn'))
+
+        m = m.get_next()
+        season.add_month(m)
+        self.assertEqual(len(season.months), 2)
+
+    def test_window(self):
+        season = Season(window=2)
+        m = Month(year=2019, month=1, holidays_left=30, state='sn')
+
+        for i in range(5):
+            m.append('h', 2 + i, None, None, None, 'Urlaub')
+            season.add_month(m)
+            m = m.get_next()
+
+        self.assertEqual(len(season.months), 2)
+        self.assertEqual(len(season.snapshots), 3)
+
+        # validation across the boundary
+        self.assertRaises(ValueError, Season(window=0).add_month(season.months[0]).add_month,
+                          Month(year=2019, month=5, state='sn'))
+
+        dump = season.dump()
+        self.assertEqual([d['month'] for d in dump], [1, 2, 3, 4, 5])
+        self.assertIsNone(dump[0]['protocol'])
+        self.assertEqual(dump[-1]['holidays_left'], 25)
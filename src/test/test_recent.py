@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from recent import RecentIndex, iter_lines_reversed
+
+
+class TestRecent(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.protocol_file = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as outfile:
+            outfile.writelines('e,2019,11,%02d,3600,,,"task %d"\n' % (day, day % 3) for day in range(1, 29))
+
+    def tearDown(self):
+        for path in (self.protocol_file, self.protocol_file + '.recent'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_iter_lines_reversed(self):
+        with open(self.protocol_file) as infile:
+            lines = infile.read().splitlines()
+
+        self.assertEqual(list(iter_lines_reversed(self.protocol_file, block_size=7)), lines[::-1])
+
+    def test_update(self):
+        index = RecentIndex(self.protocol_file).build(depth=6)
+        self.assertEqual(index.descriptions, {'task 0': 2, 'task 1': 2, 'task 2': 2})
+
+        with open(self.protocol_file, 'a') as outfile:
+            outfile.write('e,2019,11,29,3600,,,"task 2"\ne,2019,11,30,3600,,\n')
+
+        # loaded from file and updated, rows without description skipped
+        index = RecentIndex(self.protocol_file).update(depth=6)
+        self.assertEqual(index.descriptions['task 2'], 3)
+        self.assertNotIn('', index.descriptions)
+        self.assertEqual(index.added, 1)
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+import unittest
+
+from records import RecordReader, export_csv, import_csv, is_records_file
+
+
+class TestRecords(unittest.TestCase):
+
+    lines = [
+        'h,2019,01,0,30,,,"Urlaubstage"\n',
+        'c,2019,01,0,-1800,,,"Übertrag"\n',
+        'e,2019,01,02,3600,1546419600,1546423200,"say ""hello"""\n',
+        'e,2019,01,03,,1546506000,1546509600,""\n',
+        'i,2019,01,04,,,,"Krankheit"\n',
+    ]
+
+    def setUp(self):
+        fd, self.csv_file = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as outfile:
+            outfile.writelines(self.lines)
+
+        self.records_file = self.csv_file + '.rec'
+
+    def tearDown(self):
+        for path in (self.csv_file, self.records_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_roundtrip(self):
+        self.assertEqual(import_csv(self.csv_file, self.records_file), len(self.lines))
+        self.assertTrue(is_records_file(self.records_file))
+        self.assertFalse(is_records_file(self.csv_file))
+
+        outfile = io.StringIO()
+        export_csv(self.records_file, outfile)
+
+        self.assertEqual(outfile.getvalue(), ''.join(self.lines))
+
+    def test_reader(self):
+        import_csv(self.csv_file, self.records_file)
+
+        with RecordReader(self.records_file) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader[1], ('c', 2019, 1, 0, -1800, None, None, 'Übertrag'))
+            self.assertEqual(reader[-2], ('e', 2019, 1, 3, None, 1546506000, 1546509600, ''))
+            self.assertEqual([row[0] for row in reader], ['h', 'c', 'e', 'e', 'i'])
+            self.assertEqual(reader.records.nbytes, 5 * 40)
+
+        self.assertRaises(ValueError, RecordReader, self.csv_file)
+
+    def test_row_without_description(self):
+        with open(self.csv_file, 'a') as outfile:
+            outfile.write('e,2019,01,05,3600,,\n')
+
+        import_csv(self.csv_file, self.records_file)
+
+        with RecordReader(self.records_file) as reader:
+            self.assertEqual(reader[-1], ('e', 2019, 1, 5, 3600, None, None, ''))
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
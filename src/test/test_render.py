@@ -0,0 +1,40 @@
+import io
+import unittest
+
+from protocol import Month
+from render import render, TextSink, CsvSummarySink
+
+
+class TestRender(unittest.TestCase):
+
+    def setUp(self):
+        self.years = {2019: {}}
+
+        m = Month(year=2019, month=11, holidays_left=10, state='sn')
+        m.append('e', 4, 3600, None, None, 'duration given')
+        m.append('e', 5, None, 1572940800, 1572948000, 'fromto given')
+        self.years[2019][11] = m
+
+        m = m.get_next()
+        m.append('h', 2, None, None, None, 'Urlaub')
+        self.years[2019][12] = m
+
+    def test_text_sink(self):
+        # one pass must give the same as pretty()
+        outfile = io.StringIO()
+        render(self.years, (TextSink(outfile),))
+
+        self.assertEqual(outfile.getvalue(),
+                         self.years[2019][12].pretty() + '\n' + self.years[2019][11].pretty() + '\n')
+
+    def test_csv_summary_sink(self):
+        outfile = io.StringIO()
+        render(self.years, (CsvSummarySink(outfile),), reverse=False)
+
+        rows = outfile.getvalue().splitlines()
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(rows[1].startswith('2019,11,2,10800,'))
+        self.assertTrue(rows[2].startswith('2019,12,1,14400,'))
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from protocol import Month
+from summary import Summary, merge
+
+
+def get_summary(source: str, hours: int, months=(1, 2)) -> Summary:
+    years = {2019: {}}
+    former = None
+
+    for m in months:
+        month = former.get_next(2019, m) if former else Month(2019, m, state='sn')
+        month.append('e', 2, hours * 3600, None, None, 'test')
+        month.append('i', 3, None, None, None, 'Krankheit')
+        years[2019][m] = former = month
+
+    return Summary.from_years(years, source)
+
+
+class TestSummary(unittest.TestCase):
+
+    def test_merge(self):
+        a, b, c = get_summary('a', 1), get_summary('b', 2, (2, 3)), get_summary('c', 3)
+
+        self.assertEqual(a.merge(b).merge(c).dump(), a.merge(b.merge(c)).dump())
+        self.assertEqual(merge((c, a, b)).dump(), merge((a, b, c)).dump())
+
+        team = merge((a, b, c))
+        self.assertEqual(team.months['2019-02']['protocols'], 3)
+        self.assertEqual(team.months['2019-02']['working_hours'], (1 + 2 + 3 + 3 * 4) * 3600)
+        self.assertEqual(team.months['2019-02']['tags']['i'], [3 * 4 * 3600, 3])
+        self.assertEqual(team.months['2019-03']['protocols'], 1)
+
+        self.assertRaises(ValueError, team.merge, a)
+
+    def test_write_read(self):
+        summary = merge((get_summary('a', 1), get_summary('b', 2)))
+
+        fd, path = tempfile.mkstemp(suffix='.partial')
+        os.close(fd)
+
+        try:
+            summary.write(path)
+            self.assertEqual(Summary.read(path).dump(), summary.dump())
+        finally:
+            os.remove(path)
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,56 @@
+import csv
+import datetime
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'misc'))
+
+from translate import iter_legacy_rows, translate, translate_rows
+
+LEGACY = '''Datum;Stunden;Beschreibung
+12.11.;1,5;"8:30-10 review"
+
+04.11.;2;"meeting"
+insgesamt;3,5;
+'''
+
+
+class TestTranslate(unittest.TestCase):
+
+    def test_translate_rows(self):
+        rows = list(translate_rows(iter_legacy_rows(LEGACY.splitlines()), 2019))
+
+        self.assertEqual(rows[1], ['e', 2019, 11, 4, 7200, None, None, 'meeting'])
+
+        # from-to is moved out of the description
+        from_unixtime = int(datetime.datetime(2019, 11, 12, 8, 30).timestamp())
+        self.assertEqual(rows[0], ['e', 2019, 11, 12, 5400, from_unixtime, from_unixtime + 5400, ' review'])
+
+        with self.assertRaises(ValueError):
+            list(translate_rows([['04.11.', '1', ''], ['01.12.', '1', '']], 2019))
+
+    def test_translate(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, content in (('etime.19-11.csv', LEGACY), ('etime.19-10.csv', '31.10.;1;"late"\n')):
+                with open(os.path.join(tmpdir, name), 'w') as outfile:
+                    outfile.write(content)
+
+            outdir = os.path.join(tmpdir, 'translated')
+            count = translate((os.path.join(tmpdir, name) for name in ('etime.19-11.csv', 'etime.19-10.csv')),
+                              outdir, jobs=1)
+
+            self.assertEqual(count, 3)
+            self.assertEqual(sorted(os.listdir(outdir)), ['201910.csv', '201911.csv', 'translated.csv'])
+
+            with open(os.path.join(outdir, '201911.csv')) as infile:
+                self.assertEqual([row[3] for row in csv.reader(infile)], ['4', '12'])
+
+            # all rows in chronological order
+            with open(os.path.join(outdir, 'translated.csv')) as infile:
+                self.assertEqual([tuple(row[1:4]) for row in csv.reader(infile)],
+                                 [('2019', '10', '31'), ('2019', '11', '4'), ('2019', '11', '12')])
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
@@ -0,0 +1,37 @@
+import datetime
+import unittest
+
+from workdays import get_calendar, easter_sunday, weekend_days
+
+
+class TestWorkdays(unittest.TestCase):
+
+    def test_easter_sunday(self):
+        self.assertEqual(easter_sunday(2019), datetime.date(2019, 4, 21))
+        self.assertEqual(easter_sunday(2000), datetime.date(2000, 4, 23))
+
+    def test_weekend_days(self):
+        self.assertEqual(weekend_days(2000), 106)
+        self.assertEqual(weekend_days(2005), 105)
+        self.assertEqual(weekend_days(2020), 104)
+
+    def test_count(self):
+        workdays = get_calendar('sn')
+
+        self.assertEqual(workdays.year(2000), 250)
+        self.assertEqual(workdays.year(2010), 255)
+        self.assertEqual(sum(workdays.month(2012, m) for m in range(1, 13)), 251)
+
+        # Buß und Bettag 2019 is on 20th
+        self.assertFalse(workdays.is_working_day(datetime.date(2019, 11, 20)))
+        self.assertEqual(workdays.count(datetime.date(2019, 11, 18), datetime.date(2019, 11, 24)), 4)
+        self.assertEqual(workdays.count(datetime.date(2019, 11, 1), datetime.date(2019, 11, 30)),
+                         workdays.month(2019, 11))
+        self.assertEqual(workdays.count(datetime.date(1900, 1, 1), datetime.date(2100, 12, 31)),
+                         sum(workdays.year(y) for y in range(1900, 2101)))
+
+        self.assertRaises(ValueError, workdays.month, 1899, 12)
+        self.assertRaises(ValueError, get_calendar, 'xx')
+
+
+# vim: ai sts=4 ts=4 sw=4 expandtab
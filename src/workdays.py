@@ -0,0 +1,264 @@
+#!venv/bin/python
+"""
+This module provides a precomputed calendar of working days
+
+For every state the calendar holds one bit per day from 1900 to 2100
+telling whether the day is a working day, i.e. neither weekend nor
+public holiday. Bits are stored in one word per month along with
+a prefix count so working days of any month or range of dates are
+counted by at most two popcounts.
+
+Public holidays follow the rules applied by :program:`vacation`.
+Called as a script it replaces the former :file:`misc/weekends`
+and :file:`misc/special_years`.
+"""
+
+import argparse
+import calendar
+import datetime
+from array import array
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+
+STATES = ('BW', 'BY', 'BE', 'BB', 'HB', 'HH', 'HE', 'MV',
+          'NI', 'NW', 'RP', 'SL', 'SN', 'ST', 'SH', 'TH')
+
+
+def easter_sunday(year: int) -> datetime.date:
+    """return easter sunday of `year` according to the formula of Gauß/Lichtenberg"""
+
+    # Säkularzahl
+    k = year // 100
+    # säkulare Mondschaltung
+    m = 15 + (3 * k + 3) // 4 - (8 * k + 13) // 25
+    # säkulare Sonnenschaltung
+    s = 2 - (3 * k + 3) // 4
+    # Mondparameter
+    a = year % 19
+    # Keim für den ersten Vollmond im Frühling
+    d = (19 * a + m) % 30
+    # Kalendarische Korrekturgröße
+    r = (d + a // 11) // 29
+    # Ostergrenze
+    og = 21 + d - r
+    # erster Sonntag im März
+    sz = 7 - (year + year // 4 + s) % 7
+    # Osterentfernung (Ostersonntag von Ostergrenze)
+    oe = 7 - (og - sz) % 7
+
+    # Ostersonntag as date of march
+    return datetime.date(year, 3, 1) + datetime.timedelta(days=og + oe - 1)
+
+
+def get_holidays(year: int, state: str = None) -> set:
+    """
+    return the public holidays of a year
+
+    :param state: state code. If None, holidays of all states count.
+    :return: set of :class:`datetime.date`
+    """
+
+    state = state.upper() if state else None
+
+    def valid_in(*states):
+        return state is None or state in states
+
+    day = datetime.timedelta(days=1)
+    easter = easter_sunday(year)
+
+    # general public
+    holidays = {
+        # Neujahr
+        datetime.date(year, 1, 1),
+        # Tag der Arbeit
+        datetime.date(year, 5, 1),
+        # Tag der deutschen Einheit
+        datetime.date(year, 10, 3),
+        # Erster und Zweiter Weihnachtsfeiertag
+        datetime.date(year, 12, 25),
+        datetime.date(year, 12, 26),
+        # Karfreitag
+        easter - 2 * day,
+        # Ostermontag
+        easter + day,
+        # Christi Himmelfahrt
+        easter + 39 * day,
+        # Pfingstmontag
+        easter + 50 * day,
+    }
+
+    # state related
+    #
+    # Heilige Drei Könige
+    if valid_in('BY', 'BW', 'ST'):
+        holidays.add(datetime.date(year, 1, 6))
+    # Oster- und Pfingstsonntag
+    if valid_in('BB'):
+        holidays.update((easter, easter + 49 * day))
+    # Mariä Himmelfahrt
+    if valid_in('BY', 'SL'):
+        holidays.add(datetime.date(year, 8, 15))
+    # Reformationstag
+    if valid_in('BB', 'MV', 'SN', 'ST', 'TH'):
+        holidays.add(datetime.date(year, 10, 31))
+    # Allerheiligen
+    if valid_in('BW', 'BY', 'NW', 'RP', 'SL'):
+        holidays.add(datetime.date(year, 11, 1))
+    # Buß und Bettag
+    # Mittwoch zwischen 16. und 22. November
+    if valid_in('SN'):
+        november_16 = datetime.date(year, 11, 16)
+        holidays.add(november_16 + (2 - november_16.weekday()) % 7 * day)
+    # Fronleichnam
+    if valid_in('BW', 'BY', 'HE', 'NW', 'RP', 'SL'):
+        holidays.add(easter + 60 * day)
+
+    return holidays
+
+
+def weekend_days(year: int) -> int:
+    """return the number of saturdays and sundays in `year`"""
+
+    days = 366 if calendar.isleap(year) else 365
+
+    # 52 full weeks, the remaining days start with new year’s day
+    first = datetime.date(year, 1, 1).weekday()
+
+    return 104 + sum((first + i) % 7 >= 5 for i in range(days - 364))
+
+
+def popcount(word: int) -> int:
+    """return the number of bits set in `word`"""
+
+    return bin(word).count('1')
+
+
+class WorkdayCalendar:
+    """
+    Provides working days from 1900 to 2100 for a state
+
+    Bit `d - 1` of a month’s word is set if day `d` is a working day.
+
+    :param state: state code, case insensitive. If None, holidays of all states count.
+    :raises ValueError: when the state is unknown
+    """
+
+    def __init__(self, state: str = None):
+        if state and state.upper() not in STATES:
+            raise ValueError('unknown state code: %s' % state)
+
+        self.state = state.upper() if state else None
+
+        # one word per month and working days before each month
+        self.words = array('L')
+        self.prefix = array('L', [0])
+
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            holidays = get_holidays(year, self.state)
+
+            for month in range(1, 13):
+                first, days = calendar.monthrange(year, month)
+                word = 0
+
+                for day in range(days):
+                    if (first + day) % 7 < 5 and datetime.date(year, month, day + 1) not in holidays:
+                        word |= 1 << day
+
+                self.words.append(word)
+                self.prefix.append(self.prefix[-1] + popcount(word))
+
+    def _index(self, year: int, month: int) -> int:
+        if year < FIRST_YEAR or year > LAST_YEAR:
+            raise ValueError('%d is not within %d to %d' % (year, FIRST_YEAR, LAST_YEAR))
+
+        return (year - FIRST_YEAR) * 12 + month - 1
+
+    def is_working_day(self, date: datetime.date) -> bool:
+        """tell whether `date` is a working day"""
+
+        return bool(self.words[self._index(date.year, date.month)] >> (date.day - 1) & 1)
+
+    def _count_upto(self, date: datetime.date, inclusive: bool) -> int:
+        idx = self._index(date.year, date.month)
+        days = date.day if inclusive else date.day - 1
+
+        return self.prefix[idx] + popcount(self.words[idx] & ((1 << days) - 1))
+
+    def count(self, start: datetime.date, end: datetime.date) -> int:
+        """return the number of working days from `start` up to and including `end`"""
+
+        return self._count_upto(end, True) - self._count_upto(start, False)
+
+    def month(self, year: int, month: int) -> int:
+        """return the number of working days in a month"""
+
+        idx = self._index(year, month)
+
+        return self.prefix[idx + 1] - self.prefix[idx]
+
+    def year(self, year: int) -> int:
+        """return the number of working days in a year"""
+
+        idx = self._index(year, 1)
+
+        return self.prefix[idx + 12] - self.prefix[idx]
+
+
+# calendars already built by state
+_calendars = {}
+
+
+def get_calendar(state: str = None) -> WorkdayCalendar:
+    """return the calendar for `state`, built on first use"""
+
+    key = state.upper() if state else None
+
+    if key not in _calendars:
+        _calendars[key] = WorkdayCalendar(key)
+
+    return _calendars[key]
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='working days and weekends')
+    subparser = parser.add_subparsers(title='Commands', dest='command')
+
+    weekends = subparser.add_parser('weekends', help='show weekend days of a year')
+    weekends.add_argument('year', type=int)
+
+    special_years = subparser.add_parser('special-years', help='show years with 105 or 106 weekend days')
+    special_years.add_argument('first', type=int, nargs='?', default=FIRST_YEAR)
+    special_years.add_argument('last', type=int, nargs='?', default=LAST_YEAR)
+
+    working_days = subparser.add_parser('working-days', help='show working days of a year by month')
+    working_days.add_argument('year', type=int)
+    working_days.add_argument('state', nargs='?')
+
+    parsed = parser.parse_args()
+
+    if parsed.command == 'weekends':
+        print('%d is %sleap-year' % (parsed.year, '' if calendar.isleap(parsed.year) else 'no '))
+        print('1.1.%d is %s' % (parsed.year, calendar.day_name[datetime.date(parsed.year, 1, 1).weekday()]))
+        print('31.12.%d is %s' % (parsed.year, calendar.day_name[datetime.date(parsed.year, 12, 31).weekday()]))
+        print('%d has %d weekend days' % (parsed.year, weekend_days(parsed.year)))
+
+    elif parsed.command == 'special-years':
+        for year in range(parsed.first, parsed.last + 1):
+            if weekend_days(year) > 104:
+                print('%d has %d weekend days' % (year, weekend_days(year)))
+
+    elif parsed.command == 'working-days':
+        workdays = get_calendar(parsed.state)
+
+        for month in range(1, 13):
+            print('%d-%02d: %d' % (parsed.year, month, workdays.month(parsed.year, month)))
+
+        print('%d: %d' % (parsed.year, workdays.year(parsed.year)))
+
+    else:
+        parser.print_usage()
+        exit(-1)
+
+# vim: ai sts=4 ts=4 sw=4 expandtab